@@ -0,0 +1,118 @@
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.http import HttpResponse
+from rest_framework.exceptions import APIException, NotFound
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .mixins import catalog_cache_key, catalog_response
+from .serializers import RecipesReadSerializer
+from .views import IngredientsViewSet, RecipesViewSet, TagsViewSet
+from foodgram_backend.metrics import CACHE_REQUESTS
+from recipes.cache import aget_catalog_version
+from recipes.models import Recipes
+
+
+def json_response(data, status=200):
+    return HttpResponse(
+        JSONRenderer().render(data),
+        status=status,
+        content_type='application/json'
+    )
+
+
+async def get_api_request(request, viewset):
+    """Аутентификация и выбор формата ответа как в DRF."""
+    api_request = Request(
+        request,
+        authenticators=[
+            authentication()
+            for authentication in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+        ],
+        negotiator=api_settings.DEFAULT_CONTENT_NEGOTIATION_CLASS(),
+    )
+    if 'HTTP_AUTHORIZATION' in request.META:
+        await sync_to_async(getattr)(api_request, 'user')
+    api_request.accepted_renderer, _ = (
+        api_request.negotiator.select_renderer(
+            api_request,
+            [renderer() for renderer in viewset.renderer_classes]
+        )
+    )
+    return api_request
+
+
+def error_response(request, exc):
+    response = json_response({'detail': exc.detail}, exc.status_code)
+    if exc.status_code == 401:
+        response['WWW-Authenticate'] = (
+            request.authenticators[0].authenticate_header(request)
+        )
+    return response
+
+
+def async_get_view(viewset, actions, **initkwargs):
+    """Оборачивает async-обработчик GET, остальное отдаёт в DRF.
+
+    Запросы не в JSON и все методы, кроме GET, обрабатывает
+    синхронное представление вьюсета.
+    """
+    sync_view = sync_to_async(viewset.as_view(actions, **initkwargs))
+
+    def decorator(handler):
+        async def view(request, *args, **kwargs):
+            if request.method != 'GET':
+                return await sync_view(request, *args, **kwargs)
+            try:
+                api_request = await get_api_request(request, viewset)
+            except APIException:
+                return await sync_view(request, *args, **kwargs)
+            if api_request.accepted_renderer.format != 'json':
+                return await sync_view(request, *args, **kwargs)
+            try:
+                response = await handler(api_request, *args, **kwargs)
+            except APIException as exc:
+                return error_response(api_request, exc)
+            if response is None:
+                return await sync_view(request, *args, **kwargs)
+            return response
+        view.csrf_exempt = True
+        return view
+    return decorator
+
+
+def catalog_list(viewset):
+    """Список справочника из кэша; при промахе его заполняет DRF."""
+    model = viewset.queryset.model
+
+    async def handler(request):
+        key = catalog_cache_key(
+            model, await aget_catalog_version(model), request.get_full_path()
+        )
+        cached = await cache.aget(key)
+        if cached is None:
+            return None
+        CACHE_REQUESTS.labels('catalog', 'hit').inc()
+        return catalog_response(request, *cached)
+    return async_get_view(viewset, {'get': 'list'})(handler)
+
+
+tags_list = catalog_list(TagsViewSet)
+ingredients_list = catalog_list(IngredientsViewSet)
+
+
+@async_get_view(
+    RecipesViewSet,
+    {'get': 'retrieve', 'patch': 'partial_update', 'delete': 'destroy'}
+)
+async def recipe_detail(request, pk):
+    try:
+        recipe = await RecipesViewSet.get_read_queryset(
+            request.user
+        ).aget(pk=pk)
+    except Recipes.DoesNotExist:
+        raise NotFound()
+    return json_response(
+        RecipesReadSerializer(recipe, context={'request': request}).data
+    )
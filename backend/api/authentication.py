@@ -0,0 +1,59 @@
+from copy import copy
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from foodgram_backend.metrics import CACHE_REQUESTS
+from recipes.counters import counter_fields
+
+
+def token_cache_key(key):
+    return f'auth:token:{key}'
+
+
+def get_cached_user(key):
+    return cache.get(token_cache_key(key))
+
+
+def cache_user(key, user):
+    """Кладёт пользователя в кэш без счётчиков.
+
+    Счётчики меняются через F() без post_save, поэтому в кэше они бы
+    устарели. Без них поля считаются отложенными: чтение подгружает
+    свежее значение, а save() их не записывает.
+    """
+    user = copy(user)
+    for field in counter_fields(user.__class__):
+        user.__dict__.pop(field, None)
+    cache.set(
+        token_cache_key(key), user, settings.AUTH_TOKEN_CACHE_TIMEOUT
+    )
+
+
+def forget_tokens(*keys):
+    cache.delete_many([token_cache_key(key) for key in keys])
+
+
+def forget_user(user_id):
+    forget_tokens(
+        *Token.objects.filter(user_id=user_id).values_list('key', flat=True)
+    )
+
+
+class CachingTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication без запроса к базе для известных токенов."""
+
+    def authenticate_credentials(self, key):
+        if not settings.AUTH_TOKEN_CACHE_TIMEOUT:
+            return super().authenticate_credentials(key)
+        user = get_cached_user(key)
+        CACHE_REQUESTS.labels(
+            'auth_token', 'miss' if user is None else 'hit'
+        ).inc()
+        if user is not None:
+            return user, Token(key=key, user=user)
+        user, token = super().authenticate_credentials(key)
+        cache_user(key, user)
+        return user, token
@@ -1,20 +1,55 @@
 import django_filters
-from recipes.models import Ingredients, Recipes
+from django.db.models import F
+from django.db.models.functions import Coalesce
+from recipes.constant import INGREDIENTS_SEARCH_LIMIT
+from recipes.models import Ingredients, Recipes, Tags
+from recipes.ranking import RANKING_FIELDS
+
+from .search import ingredient_index
 
 
 class IngredientsFilter(django_filters.FilterSet):
-    name = django_filters.CharFilter(
-        field_name='name', lookup_expr='istartswith'
+    name = django_filters.CharFilter(method='filter_options')
+    limit = django_filters.NumberFilter(
+        method='filter_options', min_value=1
+    )
+    substring = django_filters.BooleanFilter(
+        method='filter_options',
+        widget=django_filters.widgets.BooleanWidget()
     )
 
     class Meta:
         model = Ingredients
-        fields = ('name',)
+        fields = ('name', 'limit', 'substring')
+
+    def filter_options(self, queryset, name, value):
+        return queryset
+
+    @property
+    def qs(self):
+        """С name отвечает список продуктов из индекса, без запросов к базе."""
+        if not self.is_valid() or not self.form.cleaned_data.get('name'):
+            return super().qs
+        return ingredient_index.search(
+            self.form.cleaned_data['name'],
+            limit=int(
+                self.form.cleaned_data.get('limit')
+                or INGREDIENTS_SEARCH_LIMIT
+            ),
+            substring=bool(self.form.cleaned_data.get('substring')),
+        )
 
 
 class RecipesFilter(django_filters.FilterSet):
+    search = django_filters.CharFilter(
+        field_name='name', lookup_expr='icontains'
+    )
     author = django_filters.NumberFilter(field_name='author__id')
-    tags = django_filters.AllValuesMultipleFilter(field_name='tags__slug')
+    tags = django_filters.ModelMultipleChoiceFilter(
+        field_name='tags__slug',
+        to_field_name='slug',
+        queryset=Tags.objects.all(),
+    )
     is_favorited = django_filters.BooleanFilter(
         method='filter_is_favorited',
         field_name='is_favorited',
@@ -25,10 +60,17 @@ class RecipesFilter(django_filters.FilterSet):
         field_name='is_in_shopping_cart',
         widget=django_filters.widgets.BooleanWidget()
     )
+    ordering = django_filters.ChoiceFilter(
+        method='filter_ordering',
+        choices=[(ordering, ordering) for ordering in RANKING_FIELDS],
+    )
 
     class Meta:
         model = Recipes
-        fields = ('author', 'tags', 'is_favorited', 'is_in_shopping_cart')
+        fields = (
+            'search', 'author', 'tags', 'is_favorited', 'is_in_shopping_cart',
+            'ordering'
+        )
 
     def filter_is_favorited(self, queryset, name, value):
         user = self.request.user
@@ -45,3 +87,8 @@ class RecipesFilter(django_filters.FilterSet):
         if value:
             return queryset.filter(shopping_carts__user=user)
         return queryset.exclude(shopping_carts__user=user)
+
+    def filter_ordering(self, queryset, name, value):
+        return queryset.annotate(rank_score=Coalesce(
+            F(f'ranking__{RANKING_FIELDS[value]}'), 0.0
+        )).order_by('-rank_score', '-id')
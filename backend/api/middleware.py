@@ -0,0 +1,181 @@
+import logging
+import time
+from collections import Counter, defaultdict
+from threading import Lock
+
+from asgiref.sync import (
+    iscoroutinefunction, markcoroutinefunction, sync_to_async
+)
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryRecorder:
+    """Обёртка над курсором, считающая запросы одного HTTP-запроса."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0
+        self.statements = Counter()
+        self.slowest = (0, '')
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.count += 1
+            self.duration += duration
+            self.statements[sql] += 1
+            if duration > self.slowest[0]:
+                self.slowest = (duration, sql)
+
+    @property
+    def duplicates(self):
+        return sum(count - 1 for count in self.statements.values())
+
+
+class QueryReport:
+    """Агрегированная статистика запросов к БД по именам представлений."""
+
+    def __init__(self):
+        self.lock = Lock()
+        self.views = defaultdict(lambda: {
+            'requests': 0,
+            'queries': 0,
+            'max_queries': 0,
+            'duplicates': 0,
+            'db_time_ms': 0.0,
+            'slowest_ms': 0.0,
+            'slowest_sql': '',
+        })
+
+    def add(self, view_name, recorder):
+        with self.lock:
+            stats = self.views[view_name]
+            stats['requests'] += 1
+            stats['queries'] += recorder.count
+            stats['max_queries'] = max(stats['max_queries'], recorder.count)
+            stats['duplicates'] += recorder.duplicates
+            stats['db_time_ms'] += recorder.duration * 1000
+            slowest, sql = recorder.slowest
+            if slowest * 1000 > stats['slowest_ms']:
+                stats['slowest_ms'] = slowest * 1000
+                stats['slowest_sql'] = sql
+
+    def as_dict(self):
+        with self.lock:
+            return {
+                view_name: {
+                    **stats,
+                    'avg_queries': stats['queries'] / stats['requests'],
+                    'avg_db_time_ms': (
+                        stats['db_time_ms'] / stats['requests']
+                    ),
+                }
+                for view_name, stats in sorted(self.views.items())
+            }
+
+    def reset(self):
+        with self.lock:
+            self.views.clear()
+
+
+query_report = QueryReport()
+
+
+def add_execute_wrapper(wrapper):
+    connection.execute_wrappers.append(wrapper)
+
+
+def remove_execute_wrapper(wrapper):
+    connection.execute_wrappers.remove(wrapper)
+
+
+class QueryRecordingMiddleware:
+    """Базовый middleware, записывающий SQL-запросы каждого HTTP-запроса.
+
+    В ASGI-режиме обёртка ставится на соединение потока, в котором
+    sync_to_async выполняет ORM-запросы текущего HTTP-запроса.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = QueryRecorder()
+        self.start(request)
+        started = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        return self.finish(
+            request, response, recorder, time.perf_counter() - started
+        )
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder()
+        self.start(request)
+        started = time.perf_counter()
+        await sync_to_async(add_execute_wrapper)(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(remove_execute_wrapper)(recorder)
+        return self.finish(
+            request, response, recorder, time.perf_counter() - started
+        )
+
+    def start(self, request):
+        pass
+
+    def finish(self, request, response, recorder, elapsed):
+        return response
+
+
+def get_query_budget(resolver_match, method):
+    view = resolver_match.func
+    action = getattr(view, 'actions', {}).get(method.lower())
+    budgets = getattr(getattr(view, 'cls', None), 'query_budgets', {})
+    return budgets.get(action)
+
+
+class QueryProfilingMiddleware(QueryRecordingMiddleware):
+    """Профилирование SQL-запросов каждого HTTP-запроса.
+
+    Добавляет заголовки Server-Timing и X-DB-Queries, копит статистику
+    в query_report и проверяет лимиты query_budgets представлений.
+    """
+
+    def finish(self, request, response, recorder, elapsed):
+        response['X-DB-Queries'] = recorder.count
+        response['Server-Timing'] = (
+            f'db;dur={recorder.duration * 1000:.2f};'
+            f'desc="{recorder.count} queries"'
+        )
+        match = request.resolver_match
+        if match is None:
+            return response
+        query_report.add(match.view_name, recorder)
+        budget = get_query_budget(match, request.method)
+        if budget is not None and recorder.count > budget:
+            message = (
+                f'{match.view_name} выполнил {recorder.count} запросов '
+                f'при лимите {budget}'
+            )
+            if settings.SQL_PROFILING_STRICT:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
@@ -0,0 +1,50 @@
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from rest_framework.renderers import JSONRenderer
+
+from foodgram_backend.metrics import CACHE_REQUESTS
+from recipes.cache import get_catalog_version
+
+
+def catalog_cache_key(model, version, full_path):
+    path = md5(full_path.encode()).hexdigest()
+    return f'catalog:{model._meta.model_name}:{version}:{path}'
+
+
+def catalog_response(request, etag, content):
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(content, content_type='application/json')
+    response['ETag'] = etag
+    return response
+
+
+class CachedListMixin:
+    """Кэширует сериализованный JSON списка и отвечает 304 по ETag."""
+
+    def get_list_cache_key(self, request):
+        model = self.get_queryset().model
+        return catalog_cache_key(
+            model, get_catalog_version(model), request.get_full_path()
+        )
+
+    def list(self, request, *args, **kwargs):
+        if request.accepted_renderer.format != 'json':
+            return super().list(request, *args, **kwargs)
+        key = self.get_list_cache_key(request)
+        cached = cache.get(key)
+        CACHE_REQUESTS.labels(
+            'catalog', 'miss' if cached is None else 'hit'
+        ).inc()
+        if cached is None:
+            content = JSONRenderer().render(
+                super().list(request, *args, **kwargs).data
+            )
+            cached = (f'"{md5(content).hexdigest()}"', content)
+            cache.set(key, cached, settings.CATALOG_CACHE_TIMEOUT)
+        return catalog_response(request, *cached)
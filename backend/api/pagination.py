@@ -0,0 +1,143 @@
+from collections import OrderedDict
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    CursorPagination, LimitOffsetPagination, PageNumberPagination
+)
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+MAX_PAGE_SIZE = 100
+
+
+class RecipesCursorPagination(CursorPagination):
+    ordering = ('-pub_date', '-id')
+    page_size_query_param = 'limit'
+    max_page_size = MAX_PAGE_SIZE
+
+    def get_ordering(self, request, queryset, view):
+        if 'rank_score' in queryset.query.annotations:
+            return ('-rank_score', '-id')
+        return super().get_ordering(request, queryset, view)
+
+
+class UsersCursorPagination(RecipesCursorPagination):
+    ordering = ('-username',)
+
+
+class KeysetOptInMixin:
+    """Переключает пагинацию на курсорную при наличии ?cursor= в запросе.
+
+    Параметр ?count=false отключает подсчёт общего числа объектов
+    в постраничном режиме.
+    """
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    cursor_pagination_class = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.cursor_paginator = None
+        self.display_page_controls = False
+        if self.cursor_query_param in request.query_params:
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        self.skip_count = request.query_params.get(
+            self.count_query_param, ''
+        ).lower() in ('false', '0')
+        if not self.skip_count:
+            return super().paginate_queryset(queryset, request, view)
+        return self.paginate_without_count(queryset, request)
+
+    def get_window(self, page):
+        page = list(page)
+        self.has_next = len(page) > self.window_size
+        return page[:self.window_size]
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        if not self.skip_count:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('count', None),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+
+class RecipesPagination(KeysetOptInMixin, PageNumberPagination):
+    cursor_pagination_class = RecipesCursorPagination
+    page_size_query_param = 'limit'
+    max_page_size = MAX_PAGE_SIZE
+
+    def paginate_without_count(self, queryset, request):
+        self.window_size = self.get_page_size(request)
+        if not self.window_size:
+            return None
+        try:
+            self.number = int(request.query_params.get(
+                self.page_query_param, 1
+            ))
+        except ValueError:
+            raise NotFound(self.invalid_page_message)
+        if self.number < 1:
+            raise NotFound(self.invalid_page_message)
+        offset = (self.number - 1) * self.window_size
+        return self.get_window(
+            queryset[offset:offset + self.window_size + 1]
+        )
+
+    def get_next_link(self):
+        if not self.skip_count:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.page_query_param,
+            self.number + 1
+        )
+
+    def get_previous_link(self):
+        if not self.skip_count:
+            return super().get_previous_link()
+        url = self.request.build_absolute_uri()
+        if self.number <= 1:
+            return None
+        if self.number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(
+            url, self.page_query_param, self.number - 1
+        )
+
+
+class UsersPagination(KeysetOptInMixin, LimitOffsetPagination):
+    cursor_pagination_class = UsersCursorPagination
+
+    def paginate_without_count(self, queryset, request):
+        self.limit = self.window_size = self.get_limit(request)
+        if self.limit is None:
+            return None
+        self.offset = self.get_offset(request)
+        return self.get_window(
+            queryset[self.offset:self.offset + self.limit + 1]
+        )
+
+    def get_next_link(self):
+        if not self.skip_count:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            replace_query_param(
+                self.request.build_absolute_uri(),
+                self.limit_query_param,
+                self.limit
+            ),
+            self.offset_query_param,
+            self.offset + self.limit
+        )
@@ -0,0 +1,80 @@
+from bisect import bisect_left
+from threading import Lock
+
+from recipes.cache import get_catalog_version
+from recipes.models import Ingredients
+
+
+def normalize(value):
+    return value.casefold().replace('ё', 'е')
+
+
+class IngredientIndex:
+    """Отсортированный в памяти индекс названий продуктов.
+
+    Индекс перестраивается при смене версии справочника продуктов: она
+    общая для всех воркеров и сверяется с базой не чаще, чем раз
+    в CATALOG_VERSION_TIMEOUT секунд.
+    """
+
+    def __init__(self):
+        self.state = (None, [], [], {})
+        self.lock = Lock()
+
+    def refresh(self):
+        version = get_catalog_version(Ingredients)
+        if version == self.state[0]:
+            return self.state
+        with self.lock:
+            if version == self.state[0]:
+                return self.state
+            objects = {
+                ingredient.id: ingredient
+                for ingredient in Ingredients.objects.only(
+                    'id', 'name', 'measurement_unit'
+                )
+            }
+            entries = sorted(
+                (normalize(ingredient.name), ingredient.id)
+                for ingredient in objects.values()
+            )
+            self.state = (
+                version,
+                [key for key, _ in entries],
+                [pk for _, pk in entries],
+                objects,
+            )
+            return self.state
+
+    def in_bulk(self, pks):
+        """Продукты по id из индекса; недостающие берутся из базы."""
+        _, _, _, objects = self.refresh()
+        found = {pk: objects[pk] for pk in pks if pk in objects}
+        missing = set(pks) - found.keys()
+        if missing:
+            found.update(Ingredients.objects.in_bulk(missing))
+        return found
+
+    def search(self, query, limit=None, substring=False):
+        """Продукты, начинающиеся с query, затем содержащие его."""
+        _, keys, ids, objects = self.refresh()
+        query = normalize(query)
+        found = []
+        index = bisect_left(keys, query)
+        while (
+            index < len(keys)
+            and keys[index].startswith(query)
+            and (limit is None or len(found) < limit)
+        ):
+            found.append(ids[index])
+            index += 1
+        if substring:
+            for key, pk in zip(keys, ids):
+                if limit is not None and len(found) >= limit:
+                    break
+                if query in key and not key.startswith(query):
+                    found.append(pk)
+        return [objects[pk] for pk in found]
+
+
+ingredient_index = IngredientIndex()
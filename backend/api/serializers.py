@@ -2,29 +2,118 @@ from collections import Counter
 
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
 from djoser.serializers import UserSerializer
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
 
+from recipes.changes import RecipeChangeSet, recipe_changed
 from recipes.constant import MIN_VALUE_AMOUNT, MIN_VALUE_COOKING_TIME
+from recipes.images import variant_name, variants_ready
 from recipes.models import (
     Ingredients, IngredientsInRecipes, Recipes,
     Subscription, Tags, Favorites, ShoppingCart
 )
 
+from .search import ingredient_index
+
 User = get_user_model()
 
 
+class ImageVariantField(serializers.ReadOnlyField):
+    def __init__(self, variant, **kwargs):
+        self.variant = variant
+        super().__init__(**kwargs)
+
+    def to_representation(self, image):
+        if not image:
+            return None
+        url = (
+            image.storage.url(variant_name(image.name, self.variant))
+            if variants_ready(image) else image.url
+        )
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+
+class BulkManyRelatedField(serializers.ManyRelatedField):
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self.child_relation.resolve(data)
+        try:
+            return super().to_internal_value(data)
+        finally:
+            self.child_relation.resolved = None
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Первичные ключи списка проверяются одним запросом."""
+    default_error_messages = {
+        'does_not_exist_bulk': 'Объекты с id {pk_values} не существуют.',
+    }
+    resolved = None
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        return BulkManyRelatedField(
+            child_relation=cls(*args, **kwargs),
+            **{
+                key: value for key, value in kwargs.items()
+                if key in MANY_RELATION_KWARGS
+            },
+        )
+
+    def get_objects(self, pks):
+        return self.get_queryset().in_bulk(pks)
+
+    def resolve(self, values):
+        pks = {
+            int(value) for value in values
+            if not isinstance(value, bool)
+            and isinstance(value, (int, str)) and str(value).isdigit()
+        }
+        self.resolved = self.get_objects(pks)
+        missing = sorted(pks - self.resolved.keys())
+        if missing:
+            self.resolved = None
+            self.fail('does_not_exist_bulk', pk_values=missing)
+
+    def to_internal_value(self, data):
+        if self.resolved is not None and not isinstance(data, bool):
+            try:
+                return self.resolved[int(data)]
+            except (KeyError, TypeError, ValueError):
+                pass
+        return super().to_internal_value(data)
+
+
+class IngredientPrimaryKeyRelatedField(BulkPrimaryKeyRelatedField):
+    default_error_messages = {
+        'does_not_exist_bulk': 'Продукты с id {pk_values} не существуют.',
+    }
+
+    def get_objects(self, pks):
+        return ingredient_index.in_bulk(pks)
+
+
 class FoodUserSerializer(UserSerializer):
     avatar = Base64ImageField(required=False, allow_null=True)
+    avatar_thumb = ImageVariantField('thumb', source='avatar')
     is_subscribed = serializers.SerializerMethodField()
 
     class Meta(UserSerializer.Meta):
         model = User
-        fields = (*UserSerializer.Meta.fields, 'avatar', 'is_subscribed')
+        fields = (
+            *UserSerializer.Meta.fields, 'avatar', 'avatar_thumb',
+            'is_subscribed'
+        )
         read_only_fields = fields
 
     def get_is_subscribed(self, author):
+        if hasattr(author, 'is_subscribed'):
+            return author.is_subscribed
         user = self.context['request'].user
         return user.is_authenticated and Subscription.objects.filter(
             user=user, author=author
@@ -50,8 +139,21 @@ class IngredientsSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'measurement_unit')
 
 
+class IngredientsInRecipeListSerializer(serializers.ListSerializer):
+    def to_internal_value(self, data):
+        id_field = self.child.fields['id']
+        if isinstance(data, list):
+            id_field.resolve(
+                item.get('id') for item in data if isinstance(item, dict)
+            )
+        try:
+            return super().to_internal_value(data)
+        finally:
+            id_field.resolved = None
+
+
 class IngredientsInRecipeSerializer(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(
+    id = IngredientPrimaryKeyRelatedField(
         queryset=Ingredients.objects.all(), source='ingredient'
     )
     name = serializers.CharField(source='ingredient.name', read_only=True)
@@ -65,14 +167,20 @@ class IngredientsInRecipeSerializer(serializers.ModelSerializer):
     class Meta:
         model = IngredientsInRecipes
         fields = ('id', 'name', 'measurement_unit', 'amount')
+        list_serializer_class = IngredientsInRecipeListSerializer
 
 
 class RecipesWriteSerializer(serializers.ModelSerializer):
     ingredients = IngredientsInRecipeSerializer(
         many=True, source='recipe_ingredients', required=True
     )
-    tags = serializers.PrimaryKeyRelatedField(
-        queryset=Tags.objects.all(), many=True, required=True
+    tags = BulkPrimaryKeyRelatedField(
+        queryset=Tags.objects.all(),
+        many=True,
+        required=True,
+        error_messages={
+            'does_not_exist_bulk': 'Теги с id {pk_values} не существуют.'
+        },
     )
     image = Base64ImageField(required=True, allow_null=False)
     cooking_time = serializers.IntegerField(
@@ -131,21 +239,50 @@ class RecipesWriteSerializer(serializers.ModelSerializer):
         return data
 
     @staticmethod
-    def ingredients_to_create(
-        recipe, ingredients_data, tags_data, is_update=False
-    ):
-        if is_update:
-            recipe.recipe_ingredients.all().delete()
-        recipe.tags.set(tags_data)
-        ingredients_to_create = [
+    def save_relations(recipe, ingredients_data, tags_data, created=False):
+        """Применяет к рецепту только изменившиеся продукты и теги."""
+        current = {} if created else {
+            item.ingredient_id: item
+            for item in recipe.recipe_ingredients.all()
+        }
+        change = RecipeChangeSet.diff(
+            recipe,
+            {
+                ingredient_id: item.amount
+                for ingredient_id, item in current.items()
+            },
+            {
+                item['ingredient'].id: item['amount']
+                for item in ingredients_data
+            },
+            set() if created else set(
+                recipe.tags.values_list('pk', flat=True)
+            ),
+            {tag.id for tag in tags_data},
+            created=created,
+        )
+        IngredientsInRecipes.objects.bulk_create(
             IngredientsInRecipes(
-                recipe=recipe,
-                ingredient=item['ingredient'],
-                amount=item['amount'],
+                recipe=recipe, ingredient_id=ingredient_id, amount=amount
             )
-            for item in ingredients_data
-        ]
-        IngredientsInRecipes.objects.bulk_create(ingredients_to_create)
+            for ingredient_id, amount in change.added.items()
+        )
+        for ingredient_id, (_, amount) in change.changed.items():
+            current[ingredient_id].amount = amount
+        IngredientsInRecipes.objects.bulk_update(
+            [current[ingredient_id] for ingredient_id in change.changed],
+            ['amount'],
+        )
+        if change.removed:
+            recipe.recipe_ingredients.filter(
+                ingredient_id__in=change.removed
+            ).delete()
+        if change.tags_removed:
+            recipe.tags.remove(*change.tags_removed)
+        if change.tags_added:
+            recipe.tags.add(*change.tags_added)
+        recipe_changed.send(sender=Recipes, change=change)
+        return change
 
     @staticmethod
     def pop_validated_data(validated_data):
@@ -153,20 +290,30 @@ class RecipesWriteSerializer(serializers.ModelSerializer):
         tags_data = validated_data.pop('tags')
         return ingredients_data, tags_data
 
+    @transaction.atomic
     def create(self, validated_data):
         ingredients_data, tags_data = self.pop_validated_data(validated_data)
         recipe = super().create(validated_data)
-        self.ingredients_to_create(recipe, ingredients_data, tags_data)
+        self.save_relations(recipe, ingredients_data, tags_data, created=True)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         ingredients_data, tags_data = self.pop_validated_data(validated_data)
-        self.ingredients_to_create(
-            instance, ingredients_data, tags_data, is_update=True
-        )
+        self.save_relations(instance, ingredients_data, tags_data)
         return super().update(instance, validated_data)
 
     def to_representation(self, instance):
+        prefetch_related_objects(
+            [instance],
+            Prefetch(
+                'recipe_ingredients',
+                queryset=IngredientsInRecipes.objects.select_related(
+                    'ingredient'
+                )
+            ),
+            'tags',
+        )
         return RecipesReadSerializer(
             instance,
             context=self.context
@@ -186,6 +333,9 @@ class RecipesReadSerializer(serializers.ModelSerializer):
         many=True, source='recipe_ingredients', read_only=True
     )
     tags = TagsSerializer(read_only=True, many=True)
+    image_thumb = ImageVariantField('thumb', source='image')
+    image_card = ImageVariantField('card', source='image')
+    image_full = ImageVariantField('full', source='image')
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
 
@@ -197,6 +347,9 @@ class RecipesReadSerializer(serializers.ModelSerializer):
             'name',
             'ingredients',
             'image',
+            'image_thumb',
+            'image_card',
+            'image_full',
             'tags',
             'cooking_time',
             'text',
@@ -205,7 +358,9 @@ class RecipesReadSerializer(serializers.ModelSerializer):
         )
         read_only_fields = fields
 
-    def check_existence(self, recipe, model):
+    def check_existence(self, recipe, model, annotation):
+        if hasattr(recipe, annotation):
+            return getattr(recipe, annotation)
         user = self.context['request'].user
         return user.is_authenticated and model.objects.filter(
             user=user,
@@ -213,35 +368,37 @@ class RecipesReadSerializer(serializers.ModelSerializer):
         ).exists()
 
     def get_is_favorited(self, recipe):
-        return self.check_existence(recipe, Favorites)
+        return self.check_existence(recipe, Favorites, 'is_favorited')
 
     def get_is_in_shopping_cart(self, recipe):
-        return self.check_existence(recipe, ShoppingCart)
+        return self.check_existence(
+            recipe, ShoppingCart, 'is_in_shopping_cart'
+        )
 
 
 class SubscribedUserSerializer(FoodUserSerializer):
     recipes = serializers.SerializerMethodField(read_only=True)
-    recipes_count = serializers.IntegerField(
-        read_only=True,
-        source='recipes.count'
-    )
+    recipes_count = serializers.ReadOnlyField()
 
     class Meta:
         model = User
         fields = (*FoodUserSerializer.Meta.fields, 'recipes', 'recipes_count')
 
     def get_recipes(self, author):
-        request = self.context.get('request')
-        limit = int(request.GET.get('recipes_limit', 10**10))
+        recipes = getattr(author, 'limited_recipes', None)
+        if recipes is None:
+            recipes = author.recipes.all()[:self.context['recipes_limit']]
         return RecipeSimpleSerializer(
-            author.recipes.all()[:limit],
+            recipes,
             many=True,
-            context={'request': request}
+            context={'request': self.context.get('request')}
         ).data
 
 
 class RecipeSimpleSerializer(serializers.ModelSerializer):
+    image_thumb = ImageVariantField('thumb', source='image')
+
     class Meta:
         model = Recipes
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'image_thumb', 'cooking_time')
         read_only_fields = fields
@@ -1,13 +1,138 @@
-from datetime import datetime
+import csv
+from itertools import islice
+from tempfile import SpooledTemporaryFile
 
-from django.template.loader import render_to_string
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+from django.utils.formats import date_format
+from django.utils.text import capfirst
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
 
+from recipes.models import Recipes, ShoppingCartIngredients
 
-def generate_shopping_list(ingredients, user, recipes):
-    context = {
-        'user': user,
-        'date': datetime.now(),
-        'ingredients': ingredients,
-        'recipes': recipes
-    }
-    return render_to_string('shopping_list.txt', context)
+CHUNK_SIZE = 500
+PDF_FONT_NAME = 'DejaVuSans'
+PDF_FONT_SIZE = 11
+PDF_LINE_HEIGHT = 16
+PDF_MARGIN = 50
+PDF_STREAM_BLOCK = 64 * 1024
+PDF_SPOOL_MAX_SIZE = 1024 * 1024
+
+
+def shopping_list_ingredients(user):
+    return (
+        ShoppingCartIngredients.objects.filter(user=user)
+        .values_list(
+            'ingredient__name', 'ingredient__measurement_unit', 'amount'
+        )
+        .order_by('ingredient__name')
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+
+
+def shopping_list_recipes(user):
+    return (
+        Recipes.objects.filter(shopping_carts__user=user)
+        .values_list('name', 'author__username')
+        .order_by('name')
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+
+
+def shopping_list_lines(user):
+    yield f'Список покупок для пользователя: {user.username}'
+    yield f'Дата составления: {date_format(timezone.localtime(), "j E Y")}'
+    yield ''
+    yield 'Продукты:'
+    for number, (name, unit, amount) in enumerate(
+        shopping_list_ingredients(user), 1
+    ):
+        yield f'    {number}. {capfirst(name)} — {amount} ({unit})'
+    yield ''
+    yield 'Рецепты:'
+    for number, (name, author) in enumerate(shopping_list_recipes(user), 1):
+        yield f'    {number}. {name} {author}'
+
+
+def chunked(lines, size=CHUNK_SIZE):
+    lines = iter(lines)
+    while chunk := list(islice(lines, size)):
+        yield chunk
+
+
+def generate_txt(user):
+    for chunk in chunked(shopping_list_lines(user)):
+        yield ''.join(f'{line}\n' for line in chunk).encode()
+
+
+class EchoBuffer:
+    def write(self, value):
+        return value
+
+
+def generate_csv(user):
+    writer = csv.writer(EchoBuffer())
+    yield ('\ufeff' + writer.writerow(
+        ('Продукт', 'Количество', 'Единица измерения')
+    )).encode()
+    for chunk in chunked(shopping_list_ingredients(user)):
+        yield ''.join(
+            writer.writerow((name, amount, unit))
+            for name, unit, amount in chunk
+        ).encode()
+
+
+def get_pdf_font():
+    if PDF_FONT_NAME not in pdfmetrics.getRegisteredFontNames():
+        try:
+            pdfmetrics.registerFont(
+                TTFont(PDF_FONT_NAME, settings.SHOPPING_LIST_FONT)
+            )
+        except OSError:
+            return 'Helvetica'
+    return PDF_FONT_NAME
+
+
+def generate_pdf(user):
+    _, height = A4
+    with SpooledTemporaryFile(max_size=PDF_SPOOL_MAX_SIZE) as buffer:
+        pdf = canvas.Canvas(buffer, pagesize=A4)
+        font = get_pdf_font()
+        y = height - PDF_MARGIN
+        pdf.setFont(font, PDF_FONT_SIZE)
+        for line in shopping_list_lines(user):
+            if y < PDF_MARGIN:
+                pdf.showPage()
+                pdf.setFont(font, PDF_FONT_SIZE)
+                y = height - PDF_MARGIN
+            pdf.drawString(PDF_MARGIN, y, line)
+            y -= PDF_LINE_HEIGHT
+        pdf.save()
+        buffer.seek(0)
+        while block := buffer.read(PDF_STREAM_BLOCK):
+            yield block
+
+
+async def iterate_async(chunks):
+    """Асинхронная обёртка над генератором для ASGI-ответов.
+
+    Блоки берутся по одному через sync_to_async, поэтому файл не
+    собирается в памяти целиком, как при синхронном итераторе под ASGI.
+    """
+    chunks = iter(chunks)
+    try:
+        while (chunk := await sync_to_async(next)(chunks, None)) is not None:
+            yield chunk
+    finally:
+        await sync_to_async(chunks.close)()
+
+
+SHOPPING_LIST_EXPORTERS = {
+    'txt': (generate_txt, 'text/plain; charset=utf-8'),
+    'csv': (generate_csv, 'text/csv; charset=utf-8'),
+    'pdf': (generate_pdf, 'application/pdf'),
+}
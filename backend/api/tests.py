@@ -0,0 +1,172 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+
+from recipes.models import (
+    Favorites, Ingredients, IngredientsInRecipes, Recipes, ShoppingCart,
+    Subscription, Tags
+)
+
+User = get_user_model()
+
+
+class RecipesQueryCountTest(TestCase):
+    """Число запросов к базе не зависит от числа рецептов и продуктов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='reader@example.com', username='reader',
+            first_name='Читатель', last_name='Рецептов', password='pass',
+        )
+        cls.token = Token.objects.create(user=cls.user)
+        cls.authors = User.objects.bulk_create(
+            User(
+                email=f'author{number}@example.com',
+                username=f'author{number}',
+                first_name='Автор', last_name='Рецептов',
+            )
+            for number in range(3)
+        )
+        cls.ingredients = Ingredients.objects.bulk_create(
+            Ingredients(name=f'продукт {number}', measurement_unit='г')
+            for number in range(20)
+        )
+        cls.tags = Tags.objects.bulk_create(
+            Tags(name=f'тег {number}', slug=f'tag-{number}')
+            for number in range(3)
+        )
+        Subscription.objects.create(user=cls.user, author=cls.authors[0])
+
+    def create_recipes(self, count, ingredients_count=3):
+        recipes = Recipes.objects.bulk_create(
+            Recipes(
+                author=self.authors[number % len(self.authors)],
+                name=f'рецепт {number}',
+                text='описание',
+                cooking_time=10,
+            )
+            for number in range(count)
+        )
+        IngredientsInRecipes.objects.bulk_create(
+            IngredientsInRecipes(
+                recipe=recipe, ingredient=ingredient, amount=1
+            )
+            for recipe in recipes
+            for ingredient in self.ingredients[:ingredients_count]
+        )
+        Recipes.tags.through.objects.bulk_create(
+            Recipes.tags.through(recipes=recipe, tags=tag)
+            for recipe in recipes
+            for tag in self.tags
+        )
+        Favorites.objects.bulk_create(
+            Favorites(user=self.user, recipe=recipe)
+            for recipe in recipes[::2]
+        )
+        ShoppingCart.objects.bulk_create(
+            ShoppingCart(user=self.user, recipe=recipe)
+            for recipe in recipes[1::2]
+        )
+        return recipes
+
+    def count_queries(self, url, authenticated=True):
+        headers = (
+            {'HTTP_AUTHORIZATION': f'Token {self.token.key}'}
+            if authenticated else {}
+        )
+        with CaptureQueriesContext(connection) as queries:
+            self.response = self.client.get(url, **headers)
+        self.assertEqual(self.response.status_code, 200)
+        return len(queries)
+
+    def assertListQueriesConstant(self, url, authenticated=True):
+        self.create_recipes(5)
+        few = self.count_queries(url, authenticated)
+        self.create_recipes(20)
+        many = self.count_queries(url, authenticated)
+        self.assertGreater(
+            len(self.response.json()['results']),
+            settings.REST_FRAMEWORK['PAGE_SIZE'],
+        )
+        self.assertEqual(few, many)
+
+    def test_list_anonymous(self):
+        self.assertListQueriesConstant(
+            '/api/recipes/?limit=20', authenticated=False
+        )
+
+    def test_list_authenticated(self):
+        self.assertListQueriesConstant('/api/recipes/?limit=20')
+
+    def test_list_cursor(self):
+        self.assertListQueriesConstant('/api/recipes/?cursor=&limit=20')
+
+    def test_list_filtered(self):
+        self.assertListQueriesConstant(
+            '/api/recipes/?limit=20&is_favorited=1&tags=tag-0'
+        )
+
+    def test_feed(self):
+        self.assertListQueriesConstant('/api/recipes/feed/?limit=20')
+
+    def test_detail(self):
+        small, = self.create_recipes(1, ingredients_count=1)
+        large, = self.create_recipes(1, ingredients_count=20)
+        self.assertEqual(
+            self.count_queries(f'/api/recipes/{small.pk}/'),
+            self.count_queries(f'/api/recipes/{large.pk}/'),
+        )
+
+
+PROFILING_MIDDLEWARE = 'api.middleware.QueryProfilingMiddleware'
+
+
+@override_settings(
+    SQL_PROFILING_STRICT=True,
+    MIDDLEWARE=[PROFILING_MIDDLEWARE, *(
+        middleware for middleware in settings.MIDDLEWARE
+        if middleware != PROFILING_MIDDLEWARE
+    )],
+)
+class QueryBudgetTest(RecipesQueryCountTest):
+    """Реальные запросы укладываются в лимиты query_budgets."""
+
+    def request(self, method, url, status=200):
+        response = getattr(self.client, method)(
+            url, HTTP_AUTHORIZATION=f'Token {self.token.key}'
+        )
+        self.assertEqual(response.status_code, status)
+        return response
+
+    def test_budgets(self):
+        recipe, *_ = self.create_recipes(5)
+        author = self.authors[1]
+        for method, url, status in (
+            ('get', '/api/users/?limit=20', 200),
+            ('get', f'/api/users/{author.pk}/', 200),
+            ('get', '/api/users/me/', 200),
+            ('get', '/api/users/subscriptions/?recipes_limit=2', 200),
+            ('post', f'/api/users/{author.pk}/subscribe/', 201),
+            ('delete', f'/api/users/{author.pk}/subscribe/', 204),
+            (
+                'get',
+                f'/api/recipes/?is_in_shopping_cart=1&author={author.pk}',
+                200,
+            ),
+            ('get', '/api/recipes/?ordering=trending&search=рецепт', 200),
+            ('get', f'/api/recipes/{recipe.pk}/', 200),
+            ('get', f'/api/recipes/{recipe.pk}/get-link/', 200),
+            ('delete', f'/api/recipes/{recipe.pk}/favorite/', 204),
+            ('post', f'/api/recipes/{recipe.pk}/favorite/', 201),
+            ('post', f'/api/recipes/{recipe.pk}/shopping_cart/', 201),
+            ('delete', f'/api/recipes/{recipe.pk}/shopping_cart/', 204),
+            ('get', '/api/recipes/download_shopping_cart/', 200),
+            ('get', '/api/recipes/feed/', 200),
+        ):
+            with self.subTest(method=method, url=url):
+                response = self.request(method, url, status)
+                self.assertIn('X-DB-Queries', response)
@@ -1,8 +1,9 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import (FoodUserViewSet, IngredientsViewSet, RecipesViewSet,
-                    TagsViewSet)
+from .views import (FoodUserViewSet, IngredientsViewSet, QueryProfilingView,
+                    RecipesViewSet, TagsViewSet)
 
 router = DefaultRouter()
 router.register(r'recipes', RecipesViewSet, basename='recipes')
@@ -11,7 +12,19 @@ router.register(r'ingredients', IngredientsViewSet, basename='ingredients')
 router.register(r'tags', TagsViewSet, basename='tags')
 
 
-urlpatterns = [
+urlpatterns = []
+
+if settings.ASYNC_VIEWS:
+    from .async_views import ingredients_list, recipe_detail, tags_list
+
+    urlpatterns += [
+        path('recipes/<int:pk>/', recipe_detail, name='recipes-detail'),
+        path('ingredients/', ingredients_list, name='ingredients-list'),
+        path('tags/', tags_list, name='tags-list'),
+    ]
+
+urlpatterns += [
     path('', include(router.urls)),
     path('auth/', include('djoser.urls.authtoken')),
+    path('profiling/', QueryProfilingView.as_view(), name='profiling'),
 ]
@@ -1,6 +1,15 @@
+from hashlib import md5
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models import Sum
-from django.http import FileResponse
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.db.models import (
+    Exists, F, OuterRef, Prefetch, Value, Window
+)
+from django.db.models.functions import RowNumber
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
 from django_filters.rest_framework import DjangoFilterBackend
@@ -8,17 +17,25 @@ from djoser.views import UserViewSet as DjoserUserViewSet
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.exceptions import NotFound
-from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import (
     AllowAny,
+    IsAdminUser,
     IsAuthenticated,
     IsAuthenticatedOrReadOnly,
 )
+from rest_framework.settings import api_settings
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.validators import ValidationError
 
 from .filters import IngredientsFilter, RecipesFilter
+from .middleware import query_report
+from .mixins import CachedListMixin
+from .pagination import (
+    RecipesCursorPagination, RecipesPagination, UsersPagination
+)
 from .permissions import IsAuthorOrReadOnly
+from .renderers import CSVRenderer, PDFRenderer, TxtRenderer
 from .serializers import (
     AvatarSerializer,
     FoodUserSerializer,
@@ -29,7 +46,15 @@ from .serializers import (
     SubscribedUserSerializer,
     TagsSerializer,
 )
-from .services import generate_shopping_list
+from .services import SHOPPING_LIST_EXPORTERS, iterate_async
+from foodgram_backend.metrics import (
+    CACHE_REQUESTS,
+    RECIPES_CREATED,
+    SHOPPING_LISTS_DOWNLOADED,
+    USER_RECIPES,
+)
+from recipes.cache import get_feed_version
+from recipes.constant import RECIPES_LIMIT_MAX
 from recipes.models import (
     Favorites,
     Ingredients,
@@ -39,6 +64,7 @@ from recipes.models import (
     Subscription,
     Tags,
 )
+from recipes.short_links import encode
 
 User = get_user_model()
 
@@ -46,7 +72,14 @@ User = get_user_model()
 class FoodUserViewSet(DjoserUserViewSet):
     queryset = User.objects.all()
     permission_classes = [AllowAny]
-    pagination_class = LimitOffsetPagination
+    pagination_class = UsersPagination
+    query_budgets = {
+        'list': 4,
+        'retrieve': 3,
+        'me': 2,
+        'subscriptions': 4,
+        'subscribe': 10,
+    }
 
     @action(
         detail=False,
@@ -72,17 +105,55 @@ class FoodUserViewSet(DjoserUserViewSet):
         user = request.user
         if request.method == 'DELETE':
             if user.avatar:
-                user.avatar.delete()
-                user.save()
+                user.avatar.delete(save=False)
+                user.save(update_fields=['avatar'])
                 return Response(status=status.HTTP_204_NO_CONTENT)
         serializer = AvatarSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         user.avatar = serializer.validated_data['avatar']
-        user.save()
+        user.save(update_fields=['avatar'])
         return Response(
             {'avatar': request.build_absolute_uri(user.avatar.url)}
         )
 
+    @staticmethod
+    def get_recipes_limit(request):
+        limit = request.query_params.get('recipes_limit')
+        if limit is None:
+            return RECIPES_LIMIT_MAX
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise ValidationError(
+                {'recipes_limit': 'Должно быть целым числом.'}
+            )
+        return min(max(limit, 0), RECIPES_LIMIT_MAX)
+
+    @staticmethod
+    def attach_limited_recipes(authors, limit):
+        recipes = {author.id: [] for author in authors}
+        for recipe in Recipes.objects.filter(
+            author__in=recipes
+        ).annotate(
+            row_number=Window(
+                RowNumber(),
+                partition_by=F('author_id'),
+                order_by=(F('pub_date').desc(), F('id').desc()),
+            )
+        ).filter(row_number__lte=limit):
+            recipes[recipe.author_id].append(recipe)
+        for author in authors:
+            author.limited_recipes = recipes[author.id]
+        return authors
+
+    def get_subscribed_data(self, request, authors):
+        limit = self.get_recipes_limit(request)
+        return SubscribedUserSerializer(
+            self.attach_limited_recipes(authors, limit),
+            many=True,
+            context={'request': request, 'recipes_limit': limit},
+        ).data
+
     @action(
         detail=True,
         methods=['POST', 'DELETE'],
@@ -103,9 +174,10 @@ class FoodUserViewSet(DjoserUserViewSet):
         )
         if not created:
             raise ValidationError({'errors': f'Уже подписаны на {author}!'})
-        return Response(SubscribedUserSerializer(
-            author, context={'request': request}
-        ).data, status=status.HTTP_201_CREATED)
+        return Response(
+            self.get_subscribed_data(request, [author])[0],
+            status=status.HTTP_201_CREATED
+        )
 
     @action(
         detail=False,
@@ -114,14 +186,14 @@ class FoodUserViewSet(DjoserUserViewSet):
     )
     def subscriptions(self, request):
         return self.get_paginated_response(
-            SubscribedUserSerializer(
+            self.get_subscribed_data(
+                request,
                 self.paginate_queryset(
-                    User.objects.filter(
-                        authors__user=request.user
-                    )),
-                many=True,
-                context={'request': request}
-            ).data
+                    User.objects.filter(authors__user=request.user).annotate(
+                        is_subscribed=Value(True)
+                    )
+                ),
+            )
         )
 
 
@@ -130,25 +202,75 @@ class RecipesViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly]
     filter_backends = [DjangoFilterBackend]
     filterset_class = RecipesFilter
+    pagination_class = RecipesPagination
     http_method_names = ['get', 'post', 'patch', 'delete']
+    query_budgets = {
+        'list': 7,
+        'retrieve': 5,
+        'get_short_link': 2,
+        'favorite': 9,
+        'shopping_cart': 15,
+        'download_shopping_cart': 1,
+        'feed': 5,
+    }
+
+    def get_queryset(self):
+        if self.action not in ('list', 'retrieve', 'feed'):
+            return Recipes.objects.all()
+        return self.get_read_queryset(self.request.user)
+
+    @staticmethod
+    def get_read_queryset(user):
+        queryset = Recipes.objects.all()
+        authors = User.objects.all()
+        if user.is_authenticated:
+            queryset = queryset.annotate(
+                is_favorited=Exists(Favorites.objects.filter(
+                    user=user, recipe=OuterRef('pk')
+                )),
+                is_in_shopping_cart=Exists(ShoppingCart.objects.filter(
+                    user=user, recipe=OuterRef('pk')
+                )),
+            )
+            authors = authors.annotate(
+                is_subscribed=Exists(Subscription.objects.filter(
+                    user=user, author=OuterRef('pk')
+                ))
+            )
+        return queryset.prefetch_related(
+            Prefetch('author', queryset=authors),
+            Prefetch(
+                'recipe_ingredients',
+                queryset=IngredientsInRecipes.objects.select_related(
+                    'ingredient'
+                )
+            ),
+            'tags',
+        )
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
+        RECIPES_CREATED.inc()
 
     def get_serializer_class(self):
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'feed']:
             return RecipesReadSerializer
         return RecipesWriteSerializer
 
     @action(detail=True, methods=['get'], url_path='get-link')
     def get_short_link(self, request, pk=None):
-        if not self.queryset.filter(pk=pk).exists():
+        try:
+            code = encode(int(pk))
+        except ValueError:
+            code = None
+        if code is None or not Recipes.objects.filter(pk=pk).exists():
             raise NotFound(f'Рецепт с id={pk} не найден!')
         return Response({'short-link': request.build_absolute_uri(
-            reverse('recipe-short-link', args=[pk])
+            reverse('recipe-short-link', args=[code])
         )})
 
     @staticmethod
+    @transaction.atomic
     def favorite_shopping_cart_related(
         model, recipe_id, request
     ):
@@ -156,6 +278,7 @@ class RecipesViewSet(viewsets.ModelViewSet):
             get_object_or_404(
                 model, user=request.user, recipe_id=recipe_id
             ).delete()
+            USER_RECIPES.labels(model._meta.model_name, 'remove').inc()
             return Response(status=status.HTTP_204_NO_CONTENT)
         recipe = get_object_or_404(Recipes, pk=recipe_id)
         _, created = model.objects.get_or_create(
@@ -166,6 +289,7 @@ class RecipesViewSet(viewsets.ModelViewSet):
                 {'errors': f'Рецепт {recipe.name} - уже добавлен'
                  f' в {model._meta.verbose_name}!'}
             )
+        USER_RECIPES.labels(model._meta.model_name, 'add').inc()
         return Response(
             RecipeSimpleSerializer(
                 recipe
@@ -199,34 +323,74 @@ class RecipesViewSet(viewsets.ModelViewSet):
             recipe_id=pk,
         )
 
+    @staticmethod
+    def get_feed_cache_key(request):
+        url = md5(request.build_absolute_uri().encode()).hexdigest()
+        user_id = request.user.id
+        return f'feed:{user_id}:{get_feed_version(user_id)}:{url}'
+
     @action(
         detail=False,
         methods=['get'],
-        url_path='download_shopping_cart',
         permission_classes=[IsAuthenticated],
+        pagination_class=RecipesCursorPagination,
     )
-    def download_shopping_cart(self, request, pk=None):
-        user = request.user
-        ingredients = (
-            IngredientsInRecipes.objects.filter(
-                recipe__shopping_carts__user=user
+    def feed(self, request):
+        cache_key = None
+        if (
+            settings.FEED_CACHE_TIMEOUT
+            and self.paginator.cursor_query_param not in request.query_params
+        ):
+            cache_key = self.get_feed_cache_key(request)
+            data = cache.get(cache_key)
+            CACHE_REQUESTS.labels(
+                'feed', 'miss' if data is None else 'hit'
+            ).inc()
+            if data is not None:
+                return Response(data)
+        page = self.paginate_queryset(self.filter_queryset(
+            self.get_queryset().filter(
+                author__in=Subscription.objects.filter(
+                    user=request.user
+                ).values('author')
             )
-            .values('ingredient__name', 'ingredient__measurement_unit')
-            .annotate(total_amount=Sum('amount'))
-            .order_by('ingredient__name')
-        )
-        recipes = Recipes.objects.filter(
-            shopping_carts__user=user
+        ))
+        response = self.get_paginated_response(
+            self.get_serializer(page, many=True).data
         )
-        return FileResponse(
-            generate_shopping_list(ingredients, user, recipes),
-            as_attachment=True,
-            filename='shopping_list.txt',
-            content_type='text/plain'
+        if cache_key is not None:
+            cache.set(cache_key, response.data, settings.FEED_CACHE_TIMEOUT)
+        return response
+
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path='download_shopping_cart',
+        permission_classes=[IsAuthenticated],
+        renderer_classes=[
+            *api_settings.DEFAULT_RENDERER_CLASSES,
+            TxtRenderer,
+            CSVRenderer,
+            PDFRenderer,
+        ],
+    )
+    def download_shopping_cart(self, request, pk=None):
+        export_format = request.accepted_renderer.format
+        if export_format not in SHOPPING_LIST_EXPORTERS:
+            export_format = 'txt'
+        generate, content_type = SHOPPING_LIST_EXPORTERS[export_format]
+        SHOPPING_LISTS_DOWNLOADED.labels(export_format).inc()
+        content = generate(request.user)
+        if isinstance(request._request, ASGIRequest):
+            content = iterate_async(content)
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = (
+            f'attachment; filename="shopping_list.{export_format}"'
         )
+        return response
 
 
-class IngredientsViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientsViewSet(CachedListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Ingredients.objects.all()
     serializer_class = IngredientsSerializer
     pagination_class = None
@@ -235,7 +399,19 @@ class IngredientsViewSet(viewsets.ReadOnlyModelViewSet):
     search_fields = '^name'
 
 
-class TagsViewSet(viewsets.ReadOnlyModelViewSet):
+class TagsViewSet(CachedListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Tags.objects.all()
     serializer_class = TagsSerializer
     pagination_class = None
+
+
+class QueryProfilingView(APIView):
+    """Сводка SQL-профилирования по представлениям."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(query_report.as_dict())
+
+    def delete(self, request):
+        query_report.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,97 @@
+import os
+
+from django.http import HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge,
+    Histogram, generate_latest, multiprocess
+)
+
+from api.middleware import QueryRecordingMiddleware
+
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+REQUEST_LATENCY = Histogram(
+    'foodgram_http_request_duration_seconds',
+    'Время обработки HTTP-запроса',
+    ['route', 'method', 'status'],
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    'foodgram_http_requests_in_progress',
+    'Запросы, обрабатываемые в данный момент',
+    multiprocess_mode='livesum',
+)
+DB_QUERIES = Histogram(
+    'foodgram_db_queries_per_request',
+    'Число SQL-запросов на HTTP-запрос',
+    ['route'],
+    buckets=QUERY_BUCKETS,
+)
+DB_TIME = Histogram(
+    'foodgram_db_time_seconds',
+    'Суммарное время SQL-запросов на HTTP-запрос',
+    ['route'],
+)
+CACHE_REQUESTS = Counter(
+    'foodgram_cache_requests_total',
+    'Обращения к кэшу',
+    ['cache', 'result'],
+)
+RECIPES_CREATED = Counter(
+    'foodgram_recipes_created_total', 'Созданные рецепты'
+)
+USER_RECIPES = Counter(
+    'foodgram_user_recipes_total',
+    'Добавления и удаления рецептов в избранном и списке покупок',
+    ['list', 'action'],
+)
+SHOPPING_LISTS_DOWNLOADED = Counter(
+    'foodgram_shopping_lists_downloaded_total',
+    'Скачанные списки покупок',
+    ['format'],
+)
+SHORT_LINK_REDIRECTS = Counter(
+    'foodgram_short_link_redirects_total', 'Переходы по коротким ссылкам'
+)
+GUNICORN_WORKERS = Gauge(
+    'foodgram_gunicorn_workers',
+    'Число рабочих процессов gunicorn',
+    multiprocess_mode='livemax',
+)
+GUNICORN_WORKER_EXITS = Counter(
+    'foodgram_gunicorn_worker_exits_total',
+    'Завершения рабочих процессов gunicorn',
+)
+
+
+def get_registry():
+    if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def metrics_view(request):
+    return HttpResponse(
+        generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST
+    )
+
+
+class MetricsMiddleware(QueryRecordingMiddleware):
+    """Время ответа и SQL-запросы по маршрутам для Prometheus."""
+
+    def start(self, request):
+        REQUESTS_IN_PROGRESS.inc()
+
+    def finish(self, request, response, recorder, elapsed):
+        REQUESTS_IN_PROGRESS.dec()
+        match = request.resolver_match
+        route = match.view_name if match else 'unmatched'
+        if route == 'metrics':
+            return response
+        REQUEST_LATENCY.labels(
+            route, request.method, response.status_code
+        ).observe(elapsed)
+        DB_QUERIES.labels(route).observe(recorder.count)
+        DB_TIME.labels(route).observe(recorder.duration)
+        return response
@@ -9,6 +9,10 @@ load_dotenv()
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = os.getenv('SECRET_KEY', get_random_secret_key())
+SHORT_LINK_SECRET = os.getenv('SHORT_LINK_SECRET') or SECRET_KEY
+SHORT_LINK_DELETED_CACHE_SIZE = int(
+    os.getenv('SHORT_LINK_DELETED_CACHE_SIZE', 10000)
+)
 DEBUG = os.getenv('DJANGO_DEBUG', 'False') == 'True'
 ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS', '127.0.0.1,localhost').split(',')
 
@@ -28,6 +32,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'foodgram_backend.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -37,6 +42,16 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+SQL_PROFILING = os.getenv('SQL_PROFILING', 'False') == 'True'
+SQL_PROFILING_STRICT = os.getenv('SQL_PROFILING_STRICT', 'False') == 'True'
+
+if SQL_PROFILING:
+    MIDDLEWARE.insert(0, 'api.middleware.QueryProfilingMiddleware')
+
+ASYNC_VIEWS = os.getenv(
+    'ASYNC_VIEWS', os.getenv('ASGI', 'False')
+) == 'True'
+
 ROOT_URLCONF = 'foodgram_backend.urls'
 
 TEMPLATES = [
@@ -71,16 +86,49 @@ DATABASES = {
             'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
             'HOST': os.getenv('DB_HOST', ''),
             'PORT': os.getenv('DB_PORT', 5432),
+            'CONN_MAX_AGE': int(os.getenv(
+                'DB_CONN_MAX_AGE', 0 if os.getenv('ASGI') == 'True' else 60
+            )),
+            'CONN_HEALTH_CHECKS': (
+                os.getenv('DB_CONN_HEALTH_CHECKS', 'True') == 'True'
+            ),
+            'DISABLE_SERVER_SIDE_CURSORS': (
+                os.getenv('DB_PGBOUNCER', 'False') == 'True'
+            ),
         }
     )
 }
 
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+}
+
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem')
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': os.getenv('CACHE_LOCATION', 'foodgram'),
+    }
+}
+
+CATALOG_CACHE_TIMEOUT = int(os.getenv('CATALOG_CACHE_TIMEOUT', 60 * 60))
+CATALOG_VERSION_TIMEOUT = int(os.getenv(
+    'CATALOG_VERSION_TIMEOUT', 5 if CACHE_BACKEND == 'locmem' else 60 * 60
+))
+FEED_CACHE_TIMEOUT = int(os.getenv('FEED_CACHE_TIMEOUT', 0))
+AUTH_TOKEN_CACHE_TIMEOUT = int(os.getenv(
+    'AUTH_TOKEN_CACHE_TIMEOUT', 0 if CACHE_BACKEND == 'locmem' else 60
+))
+
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachingTokenAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 6,
@@ -142,4 +190,12 @@ MEDIA_URL = '/media/'
 
 MEDIA_ROOT = BASE_DIR.parent / 'media'
 
+IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', 2))
+
+IMAGE_VARIANT_FORMAT = os.getenv('IMAGE_VARIANT_FORMAT', 'webp')
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+SHOPPING_LIST_FONT = os.getenv(
+    'SHOPPING_LIST_FONT', BASE_DIR.parent / 'infra' / 'DejaVuSans.ttf'
+)
@@ -1,9 +1,12 @@
 from django.contrib import admin
 from django.urls import include, path
 
+from .metrics import metrics_view
+
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('recipes/', include('recipes.urls')),
     path('api/', include('api.urls')),
+    path('metrics', metrics_view, name='metrics'),
 ]
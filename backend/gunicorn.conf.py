@@ -0,0 +1,33 @@
+import os
+import shutil
+
+asgi = os.getenv('ASGI', 'False') == 'True'
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('GUNICORN_WORKERS', 3))
+wsgi_app = (
+    'foodgram_backend.asgi:application' if asgi
+    else 'foodgram_backend.wsgi:application'
+)
+worker_class = 'uvicorn_worker.UvicornWorker' if asgi else 'sync'
+
+
+def on_starting(server):
+    directory = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory)
+
+
+def nworkers_changed(server, new_value, old_value):
+    from foodgram_backend.metrics import GUNICORN_WORKERS
+    GUNICORN_WORKERS.set(new_value)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    from foodgram_backend.metrics import GUNICORN_WORKER_EXITS
+    GUNICORN_WORKER_EXITS.inc()
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(worker.pid)
@@ -1,9 +1,10 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import Group
+from django.db.models import Prefetch
 from django.utils.safestring import mark_safe
 
-from .filters import IsInRecipesFilter
+from .filters import AuthorFilter, IsInRecipesFilter, RecipeInputFilter
 from .models import (
     Favorites, FoodUser, Ingredients, IngredientsInRecipes, Recipes,
     Subscription, Tags, ShoppingCart
@@ -15,9 +16,9 @@ admin.site.unregister(Group)
 
 class RecipesCount:
 
-    @admin.display(description='в рецептах')
+    @admin.display(description='в рецептах', ordering='recipes_count')
     def get_recipes_count(self, obj):
-        return obj.recipes.count()
+        return obj.recipes_count
 
 
 class ShoppingCartInline(admin.TabularInline):
@@ -79,13 +80,13 @@ class FoodUserAdmin(UserAdmin, RecipesCount):
             return f'<img src="{user.avatar.url}" width="50" height="50"/>'
         return '—'
 
-    @admin.display(description='подписок')
+    @admin.display(description='подписок', ordering='following_count')
     def subscriptions_count(self, user):
-        return user.followers.count()
+        return user.following_count
 
-    @admin.display(description='подписчиков')
+    @admin.display(description='подписчиков', ordering='followers_count')
     def subscribers_count(self, user):
-        return user.authors.count()
+        return user.followers_count
 
 
 @admin.register(Subscription)
@@ -134,7 +135,8 @@ class RecipesAdmin(admin.ModelAdmin):
         'get_tags',
         'get_image',
     )
-    list_filter = ('tags', 'cooking_time', 'author')
+    list_filter = ('tags', 'cooking_time', AuthorFilter)
+    list_select_related = ('author',)
     search_fields = ('name', 'author__username')
     ordering = ('-pub_date',)
     inlines = [IngredientsInRecipesInline]
@@ -151,13 +153,24 @@ class RecipesAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related(
+            Prefetch(
+                'recipe_ingredients',
+                queryset=IngredientsInRecipes.objects.select_related(
+                    'ingredient'
+                )
+            ),
+            'tags',
+        )
+
     @admin.display(description=' продуктов')
     def get_ingredients_count(self, recipe):
         return recipe.recipe_ingredients.count()
 
-    @admin.display(description='В избранном')
+    @admin.display(description='В избранном', ordering='favorites_count')
     def get_favorites_count(self, recipe):
-        return recipe.favorites.count()
+        return recipe.favorites_count
 
     @mark_safe
     @admin.display(description='Продукты')
@@ -185,7 +198,8 @@ class RecipesAdmin(admin.ModelAdmin):
 @admin.register(IngredientsInRecipes)
 class IngredientsInRecipesAdmin(admin.ModelAdmin):
     list_display = ('id', 'recipe', 'ingredient', 'amount')
-    list_filter = ('recipe', 'ingredient')
+    list_filter = (RecipeInputFilter, 'ingredient')
+    list_select_related = ('recipe', 'ingredient')
     search_fields = ('recipe__name', 'ingredient__name')
     autocomplete_fields = ['recipe', 'ingredient']
 
@@ -0,0 +1,65 @@
+from uuid import uuid4
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import CatalogVersion
+
+
+def catalog_version_key(model):
+    return f'catalog:{model._meta.model_name}:version'
+
+
+def get_catalog_version(model):
+    """Версия справочника из кэша, а раз в CATALOG_VERSION_TIMEOUT из базы.
+
+    Версия в базе видна всем воркерам и командам, поэтому сброс доходит до
+    них и с локальным для процесса кэшем.
+    """
+    key = catalog_version_key(model)
+    version = cache.get(key)
+    if version is None:
+        version = CatalogVersion.objects.get_or_create(
+            name=model._meta.label_lower,
+            defaults={'version': uuid4().hex},
+        )[0].version
+        cache.set(key, version, settings.CATALOG_VERSION_TIMEOUT)
+    return version
+
+
+async def aget_catalog_version(model):
+    version = await cache.aget(catalog_version_key(model))
+    if version is None:
+        version = await sync_to_async(get_catalog_version)(model)
+    return version
+
+
+def set_catalog_version(model):
+    version = uuid4().hex
+    CatalogVersion.objects.update_or_create(
+        name=model._meta.label_lower, defaults={'version': version}
+    )
+    cache.set(
+        catalog_version_key(model), version, settings.CATALOG_VERSION_TIMEOUT
+    )
+
+
+def invalidate_catalog(model):
+    transaction.on_commit(lambda: set_catalog_version(model))
+
+
+def feed_version_key(user_id):
+    return f'feed:{user_id}:version'
+
+
+def get_feed_version(user_id):
+    return cache.get_or_set(feed_version_key(user_id), uuid4().hex, None)
+
+
+def invalidate_feed(*user_ids):
+    cache.set_many(
+        {feed_version_key(user_id): uuid4().hex for user_id in user_ids},
+        None,
+    )
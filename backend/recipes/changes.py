@@ -0,0 +1,76 @@
+from dataclasses import dataclass, field
+
+from django.dispatch import Signal
+
+recipe_changed = Signal()
+
+
+@dataclass
+class RecipeChangeSet:
+    """Изменения состава и тегов рецепта.
+
+    added и removed — {id продукта: количество}, changed —
+    {id продукта: (было, стало)}.
+    """
+    recipe: object
+    added: dict = field(default_factory=dict)
+    removed: dict = field(default_factory=dict)
+    changed: dict = field(default_factory=dict)
+    tags_added: set = field(default_factory=set)
+    tags_removed: set = field(default_factory=set)
+    created: bool = False
+
+    @classmethod
+    def diff(cls, recipe, old_amounts, new_amounts, old_tags, new_tags,
+             created=False):
+        return cls(
+            recipe=recipe,
+            added={
+                ingredient_id: amount
+                for ingredient_id, amount in new_amounts.items()
+                if ingredient_id not in old_amounts
+            },
+            removed={
+                ingredient_id: amount
+                for ingredient_id, amount in old_amounts.items()
+                if ingredient_id not in new_amounts
+            },
+            changed={
+                ingredient_id: (old_amounts[ingredient_id], amount)
+                for ingredient_id, amount in new_amounts.items()
+                if old_amounts.get(ingredient_id, amount) != amount
+            },
+            tags_added=set(new_tags) - set(old_tags),
+            tags_removed=set(old_tags) - set(new_tags),
+            created=created,
+        )
+
+    @property
+    def old_amounts(self):
+        """Прежние количества изменённых и удалённых продуктов."""
+        return {
+            **self.removed,
+            **{
+                ingredient_id: old
+                for ingredient_id, (old, _) in self.changed.items()
+            },
+        }
+
+    @property
+    def new_amounts(self):
+        """Новые количества добавленных и изменённых продуктов."""
+        return {
+            **self.added,
+            **{
+                ingredient_id: new
+                for ingredient_id, (_, new) in self.changed.items()
+            },
+        }
+
+    @property
+    def ingredients_changed(self):
+        return bool(self.added or self.removed or self.changed)
+
+    @property
+    def tags_changed(self):
+        return bool(self.tags_added or self.tags_removed)
@@ -8,5 +8,19 @@ TAG_MAX_LENGTH = 32
 SLUG_MAX_LENGTH = 32
 INGREDIENTS_NAME_MAX_LENGTH = 128
 MEASUREMENT_UNIT_MAX_LENGTH = 64
+CATALOG_NAME_MAX_LENGTH = 64
 MIN_VALUE_AMOUNT = 1
 MIN_VALUE_COOKING_TIME = 1
+RECIPES_LIMIT_MAX = 100
+INGREDIENTS_SEARCH_LIMIT = 50
+IMAGE_VARIANTS = {'thumb': 160, 'card': 480, 'full': 1280}
+IMAGE_VARIANT_QUALITY = 80
+SHORT_CODE_ALPHABET = (
+    'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'
+)
+SHORT_CODE_LENGTH = 6
+SHORT_CODE_CHECK_LENGTH = 3
+FAVORITE_RANK_WEIGHT = 2
+CART_RANK_WEIGHT = 1
+TRENDING_HALF_LIFE_HOURS = 48
+TRENDING_WINDOW_DAYS = 14
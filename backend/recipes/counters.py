@@ -0,0 +1,52 @@
+from django.apps import apps as global_apps
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+COUNTERS = (
+    ('Recipes', 'favorites_count', 'Favorites', 'recipe'),
+    ('Recipes', 'in_carts_count', 'ShoppingCart', 'recipe'),
+    ('FoodUser', 'recipes_count', 'Recipes', 'author'),
+    ('FoodUser', 'followers_count', 'Subscription', 'author'),
+    ('FoodUser', 'following_count', 'Subscription', 'user'),
+    ('Ingredients', 'recipes_count', 'IngredientsInRecipes', 'ingredient'),
+    ('Tags', 'recipes_count', 'Recipes_tags', 'tags'),
+)
+
+
+def counter_fields(model):
+    return [
+        field for model_name, field, *_ in COUNTERS
+        if model_name == model._meta.object_name
+    ]
+
+
+def change_counter(queryset, field, delta):
+    queryset.update(**{field: Greatest(F(field) + delta, 0)})
+
+
+def actual_count(related, fk):
+    return Coalesce(
+        Subquery(
+            related.objects.filter(**{fk: OuterRef('pk')})
+            .order_by()
+            .values(fk)
+            .annotate(count=Count('pk'))
+            .values('count')
+        ),
+        0
+    )
+
+
+def reconcile_counters(apps=global_apps, fix=True):
+    """Пересчитывает счётчики, возвращает число расхождений по каждому."""
+    drift = {}
+    for model_name, field, related_name, fk in COUNTERS:
+        model = apps.get_model('recipes', model_name)
+        actual = actual_count(apps.get_model('recipes', related_name), fk)
+        stale = model.objects.annotate(actual=actual).filter(
+            ~Q(**{field: F('actual')})
+        )
+        drift[f'{model._meta.model_name}.{field}'] = (
+            stale.update(**{field: actual}) if fix else stale.count()
+        )
+    return drift
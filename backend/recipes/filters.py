@@ -1,4 +1,5 @@
 from django.contrib import admin
+from django.db.models import Q
 
 
 class IsInRecipesFilter(admin.SimpleListFilter):
@@ -22,3 +23,50 @@ class IsInRecipesFilter(admin.SimpleListFilter):
                 recipe_ingredients__isnull=True
             )
         return ingredients
+
+
+class InputFilter(admin.SimpleListFilter):
+    """Фильтр с полем ввода вместо списка всех значений."""
+    template = 'admin/input_filter.html'
+    placeholder = ''
+
+    def lookups(self, request, model_admin):
+        return ((None, None),)
+
+    def choices(self, changelist):
+        all_choice = next(super().choices(changelist))
+        all_choice['query_parts'] = [
+            (key, value)
+            for key, value in changelist.get_filters_params().items()
+            if key != self.parameter_name
+        ]
+        yield all_choice
+
+
+class AuthorFilter(InputFilter):
+    """Автор по id, никнейму или адресу почты."""
+    title = 'автору'
+    parameter_name = 'author'
+    placeholder = 'id, никнейм или почта'
+
+    def queryset(self, request, queryset):
+        value = (self.value() or '').strip()
+        if not value:
+            return queryset
+        if value.isdigit():
+            return queryset.filter(author_id=value)
+        return queryset.filter(
+            Q(author__username__iexact=value) | Q(author__email__iexact=value)
+        )
+
+
+class RecipeInputFilter(InputFilter):
+    title = 'рецепту'
+    parameter_name = 'recipe'
+    placeholder = 'id рецепта'
+
+    def queryset(self, request, queryset):
+        value = (self.value() or '').strip()
+        if not value.isdigit():
+            return queryset
+        return queryset.filter(recipe_id=value)
@@ -0,0 +1,88 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, connection, transaction
+from PIL import Image, ImageOps
+
+from .constant import IMAGE_VARIANT_QUALITY, IMAGE_VARIANTS
+
+logger = logging.getLogger(__name__)
+
+IMAGE_FORMATS = {'webp': 'WEBP', 'jpeg': 'JPEG'}
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.IMAGE_WORKERS, thread_name_prefix='images'
+)
+
+
+def variant_name(name, variant):
+    path = PurePosixPath(name)
+    return str(path.with_name(
+        f'{path.stem}.{variant}.{settings.IMAGE_VARIANT_FORMAT}'
+    ))
+
+
+def variants_field(field):
+    return f'{field}_variants'
+
+
+def variants_ready(image):
+    """Копии созданы для текущего файла: его имя записано в модели."""
+    return getattr(
+        image.instance, variants_field(image.field.name), None
+    ) == image.name
+
+
+def mark_variants(model, pk, field, name):
+    """Запоминает в строке, что для файла name копии уже созданы."""
+    model.objects.filter(pk=pk, **{field: name}).update(
+        **{variants_field(field): name}
+    )
+
+
+def has_variants(name):
+    return all(
+        default_storage.exists(variant_name(name, variant))
+        for variant in IMAGE_VARIANTS
+    )
+
+
+def generate_variants(name):
+    with default_storage.open(name) as file:
+        image = ImageOps.exif_transpose(Image.open(file))
+        image.load()
+    image_format = IMAGE_FORMATS[settings.IMAGE_VARIANT_FORMAT]
+    if image.mode not in ('RGB', 'RGBA') or image_format == 'JPEG':
+        image = image.convert('RGB')
+    for variant, size in IMAGE_VARIANTS.items():
+        resized = image.copy()
+        resized.thumbnail((size, size), Image.LANCZOS)
+        buffer = BytesIO()
+        resized.save(buffer, image_format, quality=IMAGE_VARIANT_QUALITY)
+        target = variant_name(name, variant)
+        default_storage.delete(target)
+        default_storage.save(target, ContentFile(buffer.getvalue()))
+
+
+def safe_generate_variants(model, pk, field, name):
+    """Задача executor; соединение потока с БД закрывается после неё."""
+    close_old_connections()
+    try:
+        generate_variants(name)
+        mark_variants(model, pk, field, name)
+    except Exception:
+        logger.exception('Не удалось обработать изображение %s', name)
+    finally:
+        connection.close()
+
+
+def schedule_variants(instance, field):
+    args = (type(instance), instance.pk, field, getattr(instance, field).name)
+    transaction.on_commit(
+        lambda: executor.submit(safe_generate_variants, *args)
+    )
@@ -1,36 +1,251 @@
+import csv
+import io
 import json
+import time
+from collections import Counter
+from itertools import islice
+from pathlib import Path
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from recipes.cache import invalidate_catalog
+
+READ_CHUNK_SIZE = 64 * 1024
+
+
+def iter_json_array(file):
+    """Читает JSON-массив объектов по одному элементу, не загружая файл."""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    started = False
+    while True:
+        chunk = file.read(READ_CHUNK_SIZE)
+        buffer += chunk
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if position == len(buffer):
+                break
+            if not started:
+                if buffer[position] != '[':
+                    raise CommandError('Ожидался JSON-массив')
+                started = True
+                position += 1
+                continue
+            if buffer[position] == ']':
+                return
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if not chunk:
+                    raise CommandError('Некорректный JSON')
+                break
+            yield item
+        buffer = buffer[position:]
+        if not chunk:
+            raise CommandError('JSON-массив не закрыт')
+
+
+def iter_csv(file, fields):
+    for row in csv.reader(file):
+        if tuple(row) == fields or not row:
+            continue
+        yield dict(zip(fields, row))
+
+
+def chunked(items, size):
+    items = iter(items)
+    while batch := list(islice(items, size)):
+        yield batch
 
 
 class BaseImportCommand(BaseCommand):
-    """Базовый класс для импорта данных из JSON."""
-    help = 'Импорт данных из JSON в указанную модель'
+    """Базовый класс для импорта данных из JSON или CSV."""
+    help = 'Импорт данных из JSON или CSV в указанную модель'
     model = None
+    unique_fields = ()
+    update_fields = ()
+    conflict_fields = ()
+
+    @property
+    def fields(self):
+        return (*self.unique_fields, *self.update_fields)
 
     def add_arguments(self, parser):
         parser.add_argument(
             '--file',
             type=str,
             required=True,
-            help='Путь к JSON-файлу'
+            help='Путь к JSON- или CSV-файлу'
+        )
+        parser.add_argument(
+            '--format',
+            choices=('json', 'csv'),
+            help='Формат файла, по умолчанию определяется по расширению'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Сколько записей записывать в одной транзакции'
+        )
+        parser.add_argument(
+            '--copy',
+            action='store_true',
+            help='Загружать через COPY (только PostgreSQL)'
         )
 
     def handle(self, *args, **options):
         file_path = options['file']
+        file_format = (
+            options['format'] or Path(file_path).suffix.lstrip('.').lower()
+        )
+        if file_format not in ('json', 'csv'):
+            raise CommandError(f'Неизвестный формат файла {file_path}')
+        if options['copy'] and connection.vendor != 'postgresql':
+            raise CommandError('--copy поддерживается только в PostgreSQL')
+        write_batch = self.copy_batch if options['copy'] else self.write_batch
+        stats = Counter()
+        started = time.monotonic()
         try:
-            with open(file_path, encoding='utf-8') as f:
-                data = json.load(f)
-            items = self.model.objects.bulk_create(
-                (self.model(**item) for item in data), ignore_conflicts=True,
-            )
-            self.stdout.write(
-                self.style.SUCCESS(
-                    f'Загружено {len(items)} '
-                    f'записей из {file_path}'
+            with open(file_path, encoding='utf-8-sig', newline='') as f:
+                rows = (
+                    iter_json_array(f) if file_format == 'json'
+                    else iter_csv(f, self.fields)
                 )
+                for batch in chunked(rows, options['batch_size']):
+                    with transaction.atomic():
+                        stats.update(write_batch(self.exclude_conflicts(
+                            self.clean(batch, stats), stats
+                        )))
+                    self.stdout.write(
+                        f'Обработано записей: {sum(stats.values())}',
+                        ending='\r'
+                    )
+        except OSError as error:
+            raise CommandError(f'Не удалось прочитать {file_path}: {error}')
+        finally:
+            invalidate_catalog(self.model)
+        elapsed = time.monotonic() - started
+        total = sum(stats.values())
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Добавлено {stats["inserted"]}, обновлено {stats["updated"]}'
+                f', пропущено {stats["skipped"]} записей из {file_path} '
+                f'за {elapsed:.2f} с ({total / (elapsed or 1):.0f} записей/с)'
+            )
+        )
+
+    def clean(self, batch, stats):
+        rows = {}
+        for item in batch:
+            if not isinstance(item, dict) or any(
+                not item.get(field) for field in self.fields
+            ):
+                stats['skipped'] += 1
+                continue
+            row = {field: str(item[field]).strip() for field in self.fields}
+            key = tuple(row[field] for field in self.unique_fields)
+            if key in rows:
+                stats['skipped'] += 1
+            rows[key] = row
+        return rows
+
+    def exclude_conflicts(self, rows, stats):
+        """Пропускает строки, чьё значение в conflict_fields уже занято."""
+        for field in self.conflict_fields:
+            owners = {
+                item[field]: tuple(item[key] for key in self.unique_fields)
+                for item in self.model.objects.filter(**{
+                    f'{field}__in': {row[field] for row in rows.values()}
+                }).values(field, *self.unique_fields)
+            }
+            for key, row in list(rows.items()):
+                if owners.setdefault(row[field], key) != key:
+                    del rows[key]
+                    stats['skipped'] += 1
+                    self.stderr.write(
+                        f'Пропущена запись {row}: {field} '
+                        f'«{row[field]}» уже используется'
+                    )
+        return rows
+
+    def write_batch(self, rows):
+        first_field = self.unique_fields[0]
+        existing = {
+            tuple(item[field] for field in self.unique_fields): item
+            for item in self.model.objects.filter(**{
+                f'{first_field}__in': {key[0] for key in rows}
+            }).values(*self.fields)
+        }
+        to_insert, to_update = [], []
+        for key, row in rows.items():
+            if key not in existing:
+                to_insert.append(row)
+            elif existing[key] != row:
+                to_update.append(row)
+        if self.update_fields:
+            self.model.objects.bulk_create(
+                (self.model(**row) for row in to_insert + to_update),
+                update_conflicts=True,
+                unique_fields=self.unique_fields,
+                update_fields=self.update_fields,
+            )
+        else:
+            self.model.objects.bulk_create(
+                (self.model(**row) for row in to_insert),
+                ignore_conflicts=True,
+            )
+        return {
+            'inserted': len(to_insert),
+            'updated': len(to_update),
+            'skipped': len(rows) - len(to_insert) - len(to_update),
+        }
+
+    def copy_batch(self, rows):
+        quote = connection.ops.quote_name
+        table = quote(self.model._meta.db_table)
+        temp_table = quote(f'{self.model._meta.db_table}_import')
+        columns = ', '.join(quote(field) for field in self.fields)
+        conflict = ', '.join(quote(field) for field in self.unique_fields)
+        if self.update_fields:
+            updates = ', '.join(
+                f'{quote(field)} = EXCLUDED.{quote(field)}'
+                for field in self.update_fields
+            )
+            changed = ' OR '.join(
+                f'{table}.{quote(field)} IS DISTINCT FROM '
+                f'EXCLUDED.{quote(field)}'
+                for field in self.update_fields
+            )
+            on_conflict = f'DO UPDATE SET {updates} WHERE {changed}'
+        else:
+            on_conflict = 'DO NOTHING'
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(
+            [row[field] for field in self.fields] for row in rows.values()
+        )
+        buffer.seek(0)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TEMP TABLE {temp_table} ON COMMIT DROP AS '
+                f'SELECT {columns} FROM {table} WITH NO DATA'
+            )
+            cursor.copy_expert(
+                f'COPY {temp_table} ({columns}) FROM STDIN WITH CSV', buffer
             )
-        except Exception as e:
-            self.stdout.write(
-                self.style.ERROR(f'Ошибка при загрузке файла {file_path}: {e}')
+            cursor.execute(
+                f'INSERT INTO {table} ({columns}) '
+                f'SELECT {columns} FROM {temp_table} '
+                f'ON CONFLICT ({conflict}) {on_conflict} '
+                f'RETURNING (xmax = 0)'
             )
+            written = [inserted for inserted, in cursor.fetchall()]
+        inserted = sum(written)
+        return {
+            'inserted': inserted,
+            'updated': len(written) - inserted,
+            'skipped': len(rows) - len(written),
+        }
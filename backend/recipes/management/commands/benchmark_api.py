@@ -0,0 +1,177 @@
+import json
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext, setup_test_environment, teardown_test_environment
+)
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from recipes.cache import set_catalog_version
+from recipes.models import Ingredients, Recipes, Tags
+from recipes.short_links import encode
+
+User = get_user_model()
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    index = max(0, round(percent / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    """Замер числа SQL-запросов и времени ответа эндпоинтов /api/."""
+    help = (
+        'Создаёт тестовую базу с синтетическими данными, вызывает '
+        'эндпоинты API и сохраняет p50/p95, число запросов и размер '
+        'ответа в JSON-файл'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--recipes', type=int, default=300)
+        parser.add_argument(
+            '--ingredients-per-recipe', type=int, default=8
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help='Сколько раз вызывать каждый эндпоинт'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--ingredients-file',
+            default=str(settings.BASE_DIR / 'data' / 'ingredients.json'),
+            help='Путь к JSON-файлу с продуктами'
+        )
+        parser.add_argument(
+            '--output', default='benchmark.json',
+            help='Куда записать результаты'
+        )
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True
+        )
+        try:
+            context = self.seed(options)
+            results = {
+                'database': connection.vendor,
+                'dataset': {
+                    key: options[key] for key in (
+                        'users', 'recipes', 'ingredients_per_recipe', 'seed'
+                    )
+                },
+                'endpoints': {
+                    name: self.measure(url, headers, options['repeat'])
+                    for name, url, headers in self.endpoints(context)
+                },
+            }
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+        Path(options['output']).write_text(
+            json.dumps(results, ensure_ascii=False, indent=2, sort_keys=True),
+            encoding='utf-8'
+        )
+        for name, stats in results['endpoints'].items():
+            self.stdout.write(
+                f'{name:<32} p50={stats["p50_ms"]:>8.2f}ms '
+                f'p95={stats["p95_ms"]:>8.2f}ms '
+                f'queries={stats["cold_queries"]:>4}/{stats["queries"]:<4} '
+                f'bytes={stats["bytes"]}'
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f'Результаты записаны в {options["output"]}')
+        )
+
+    def seed(self, options):
+        call_command(
+            'generate_fake_data',
+            users=options['users'],
+            recipes=options['recipes'],
+            min_ingredients=options['ingredients_per_recipe'],
+            max_ingredients=options['ingredients_per_recipe'],
+            seed=options['seed'],
+            ingredients_file=options['ingredients_file'],
+            stdout=self.stdout,
+        )
+        user = User.objects.annotate(
+            carts=Count('shopping_carts')
+        ).order_by('-carts').first()
+        for model in (Ingredients, Tags):
+            set_catalog_version(model)
+        return {
+            'headers': {
+                'HTTP_AUTHORIZATION':
+                    f'Token {Token.objects.create(user=user).key}'
+            },
+            'recipe': Recipes.objects.first(),
+            'ingredient': Ingredients.objects.order_by('name').first(),
+        }
+
+    @staticmethod
+    def endpoints(context):
+        auth = context['headers']
+        recipe = context['recipe']
+        prefix = context['ingredient'].name[:2]
+        return (
+            ('recipes-list', reverse('recipes-list'), {}),
+            ('recipes-list-auth', reverse('recipes-list'), auth),
+            (
+                'recipes-list-favorited',
+                f'{reverse("recipes-list")}?is_favorited=1', auth
+            ),
+            (
+                'recipes-detail',
+                reverse('recipes-detail', args=[recipe.pk]), auth
+            ),
+            (
+                'recipes-download-shopping-cart',
+                reverse('recipes-download-shopping-cart'), auth
+            ),
+            ('users-subscriptions', reverse('users-subscriptions'), auth),
+            ('tags-list', reverse('tags-list'), {}),
+            ('ingredients-list', reverse('ingredients-list'), {}),
+            (
+                'ingredients-search',
+                f'{reverse("ingredients-list")}?name={prefix}', {}
+            ),
+            (
+                'recipe-short-link',
+                reverse('recipe-short-link', args=[encode(recipe.pk)]), {}
+            ),
+        )
+
+    @staticmethod
+    def measure(url, headers, repeat):
+        """Первый вызов идёт с холодными кэшами, последний — с тёплыми."""
+        client = Client()
+        timings, query_counts = [], []
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                response = client.get(url, **headers)
+                content = (
+                    b''.join(response.streaming_content)
+                    if response.streaming else response.content
+                )
+                timings.append((time.perf_counter() - start) * 1000)
+            query_counts.append(len(queries))
+        return {
+            'status': response.status_code,
+            'cold_queries': query_counts[0],
+            'queries': query_counts[-1],
+            'bytes': len(content),
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+        }
@@ -0,0 +1,97 @@
+import json
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+from django.test import Client
+from django.test.utils import (
+    setup_test_environment, teardown_test_environment
+)
+from django.urls import reverse
+
+from recipes.management.commands.benchmark_api import percentile
+
+
+class Command(BaseCommand):
+    """Накладные расходы на подключение к базе с CONN_MAX_AGE и без."""
+    help = (
+        'Сравнивает время запросов при новом подключении к базе на каждый '
+        'запрос и при переиспользовании подключений'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument(
+            '--max-age', type=int, default=60,
+            help='CONN_MAX_AGE для режима переиспользования'
+        )
+        parser.add_argument(
+            '--output', default='benchmark_connections.json',
+            help='Куда записать результаты'
+        )
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        original = connection.settings_dict['CONN_MAX_AGE']
+        try:
+            results = {
+                'database': connection.vendor,
+                'host': connection.settings_dict['HOST'],
+                'server_side_cursors': not connection.settings_dict.get(
+                    'DISABLE_SERVER_SIDE_CURSORS', False
+                ),
+                'modes': {
+                    mode: self.measure(max_age, options['repeat'])
+                    for mode, max_age in (
+                        ('connect_per_request', 0),
+                        ('persistent', options['max_age']),
+                    )
+                },
+            }
+        finally:
+            connection.close()
+            connection.settings_dict['CONN_MAX_AGE'] = original
+            teardown_test_environment()
+        Path(options['output']).write_text(
+            json.dumps(results, ensure_ascii=False, indent=2), encoding='utf-8'
+        )
+        for mode, stats in results['modes'].items():
+            self.stdout.write(
+                f'{mode:<20} connect p50={stats["connect_p50_ms"]:.2f}ms '
+                f'request p50={stats["p50_ms"]:.2f}ms '
+                f'p95={stats["p95_ms"]:.2f}ms '
+                f'подключений {stats["connections"]}'
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f'Результаты записаны в {options["output"]}')
+        )
+
+    @staticmethod
+    def measure(max_age, repeat):
+        """Запросы к API с закрытием подключений как в обычном цикле."""
+        connection.close()
+        connection.settings_dict['CONN_MAX_AGE'] = max_age
+        client = Client()
+        url = f'{reverse("recipes-list")}?limit=1&count=false'
+        timings, connects, connections = [], [], 0
+        for _ in range(repeat):
+            started = time.perf_counter()
+            close_old_connections()
+            if connection.connection is None:
+                connections += 1
+                connect_started = time.perf_counter()
+                connection.ensure_connection()
+                connects.append(
+                    (time.perf_counter() - connect_started) * 1000
+                )
+            client.get(url)
+            close_old_connections()
+            timings.append((time.perf_counter() - started) * 1000)
+        return {
+            'max_age': max_age,
+            'connections': connections,
+            'connect_p50_ms': round(percentile(connects or [0], 50), 3),
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+        }
@@ -0,0 +1,225 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle
+from pathlib import Path
+from urllib.error import HTTPError, URLError
+from urllib.request import urlopen
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from django.utils.http import urlencode
+
+from recipes.management.commands.benchmark_api import percentile
+from recipes.models import Ingredients, Recipes
+from recipes.short_links import encode
+
+MODES = {'wsgi': 'False', 'asgi': 'True'}
+STARTUP_TIMEOUT = 30
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def rss_mb(pid):
+    """Суммарная RSS процесса gunicorn и его воркеров (только Linux)."""
+    pids = [pid]
+    for stat in Path('/proc').glob('[0-9]*/stat'):
+        try:
+            if int(stat.read_text().rsplit(')', 1)[1].split()[1]) == pid:
+                pids.append(int(stat.parent.name))
+        except (OSError, ValueError, IndexError):
+            continue
+    total = 0
+    for child in pids:
+        try:
+            status = Path(f'/proc/{child}/status').read_text()
+        except OSError:
+            continue
+        for line in status.splitlines():
+            if line.startswith('VmRSS:'):
+                total += int(line.split()[1])
+    return total / 1024
+
+
+class Command(BaseCommand):
+    """Сравнение пропускной способности gunicorn в режимах WSGI и ASGI."""
+    help = (
+        'Запускает gunicorn с синхронными и uvicorn-воркерами на текущей '
+        'базе и нагружает горячие эндпоинты чтения'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument(
+            '--duration', type=float, default=10,
+            help='Длительность нагрузки в каждом режиме, с'
+        )
+        parser.add_argument(
+            '--slow-clients', type=int, default=0,
+            help='Сколько соединений медленно отправляют тело запроса'
+        )
+        parser.add_argument(
+            '--modes', nargs='+', choices=MODES, default=list(MODES)
+        )
+        parser.add_argument(
+            '--output', default='benchmark_servers.json',
+            help='Куда записать результаты'
+        )
+
+    def handle(self, *args, **options):
+        urls = self.get_urls()
+        results = {}
+        for mode in options['modes']:
+            results[mode] = self.run_mode(mode, urls, options)
+            stats = results[mode]
+            self.stdout.write(
+                f'{mode}: {stats["rps"]:.0f} запросов/с, '
+                f'p50={stats["p50_ms"]:.1f}ms p95={stats["p95_ms"]:.1f}ms, '
+                f'ошибок {stats["errors"]}, RSS {stats["rss_mb"]:.0f} МБ, '
+                f'{stats["rps_per_100mb"]:.0f} запросов/с на 100 МБ'
+            )
+        Path(options['output']).write_text(
+            json.dumps(results, ensure_ascii=False, indent=2), encoding='utf-8'
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f'Результаты записаны в {options["output"]}')
+        )
+
+    @staticmethod
+    def get_urls():
+        recipes = list(Recipes.objects.values_list('pk', flat=True)[:50])
+        ingredient = Ingredients.objects.order_by('name').first()
+        if not recipes or ingredient is None:
+            raise CommandError(
+                'В базе нет рецептов, сначала выполните generate_fake_data'
+            )
+        return [
+            reverse('tags-list'),
+            f'{reverse("ingredients-list")}?'
+            f'{urlencode({"name": ingredient.name[:2]})}',
+            *(reverse('recipes-detail', args=[pk]) for pk in recipes),
+            *(
+                reverse('recipe-short-link', args=[encode(pk)])
+                for pk in recipes[:10]
+            ),
+        ]
+
+    def run_mode(self, mode, urls, options):
+        port = free_port()
+        base_url = f'http://127.0.0.1:{port}'
+        server = subprocess.Popen(
+            [
+                sys.executable, '-m', 'gunicorn',
+                '-c', str(settings.BASE_DIR / 'gunicorn.conf.py'),
+                '--bind', f'127.0.0.1:{port}',
+                '--workers', str(options['workers']),
+                '--log-level', 'warning',
+            ],
+            cwd=settings.BASE_DIR,
+            env={**os.environ, 'ASGI': MODES[mode]},
+        )
+        stop = threading.Event()
+        slow_clients = []
+        try:
+            self.wait_ready(base_url + urls[0])
+            for _ in range(options['slow_clients']):
+                client = threading.Thread(
+                    target=self.slow_upload, args=(port, stop), daemon=True
+                )
+                client.start()
+                slow_clients.append(client)
+            return self.load(server.pid, base_url, urls, options)
+        finally:
+            stop.set()
+            for client in slow_clients:
+                client.join()
+            server.terminate()
+            server.wait()
+
+    @staticmethod
+    def wait_ready(url):
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            try:
+                with urlopen(url, timeout=1):
+                    return
+            except (URLError, ConnectionError):
+                time.sleep(0.2)
+        raise CommandError(f'Сервер не запустился за {STARTUP_TIMEOUT} с')
+
+    @staticmethod
+    def slow_upload(port, stop):
+        """Держит соединение, отправляя тело запроса по байту."""
+        with socket.create_connection(('127.0.0.1', port)) as sock:
+            sock.sendall(
+                b'POST /api/recipes/ HTTP/1.1\r\nHost: 127.0.0.1\r\n'
+                b'Content-Type: application/json\r\n'
+                b'Content-Length: 1000000\r\n\r\n'
+            )
+            while not stop.wait(0.5):
+                try:
+                    sock.sendall(b' ')
+                except OSError:
+                    return
+
+    def load(self, pid, base_url, urls, options):
+        deadline = time.monotonic() + options['duration']
+        rss = []
+
+        def worker(offset):
+            timings, errors = [], 0
+            for url in cycle(urls[offset:] + urls[:offset]):
+                if time.monotonic() >= deadline:
+                    break
+                started = time.perf_counter()
+                try:
+                    with urlopen(base_url + url, timeout=30) as response:
+                        response.read()
+                except HTTPError as error:
+                    if error.code >= 500:
+                        errors += 1
+                except (URLError, ConnectionError, TimeoutError):
+                    errors += 1
+                    continue
+                timings.append((time.perf_counter() - started) * 1000)
+            return timings, errors
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(options['concurrency']) as pool:
+            futures = [
+                pool.submit(worker, offset % len(urls))
+                for offset in range(options['concurrency'])
+            ]
+            while not all(future.done() for future in futures):
+                rss.append(rss_mb(pid))
+                time.sleep(0.5)
+        elapsed = time.monotonic() - started
+        timings = [
+            timing for future in futures for timing in future.result()[0]
+        ]
+        errors = sum(future.result()[1] for future in futures)
+        peak_rss = max(rss, default=0)
+        rps = len(timings) / elapsed
+        return {
+            'requests': len(timings),
+            'errors': errors,
+            'rps': round(rps, 1),
+            'p50_ms': round(percentile(timings or [0], 50), 3),
+            'p95_ms': round(percentile(timings or [0], 95), 3),
+            'rss_mb': round(peak_rss, 1),
+            'rps_per_100mb': round(rps / peak_rss * 100, 1) if peak_rss else 0,
+            'workers': options['workers'],
+            'concurrency': options['concurrency'],
+            'slow_clients': options['slow_clients'],
+        }
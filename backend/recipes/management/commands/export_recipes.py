@@ -0,0 +1,117 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Prefetch
+
+from recipes.management.commands.base_import import chunked
+from recipes.models import IngredientsInRecipes, Recipes
+from recipes.transfer import (
+    checkpoint_path, read_checkpoint, read_image, write_checkpoint
+)
+
+
+def recipe_record(recipe):
+    return {
+        'author': recipe.author.email,
+        'name': recipe.name,
+        'text': recipe.text,
+        'cooking_time': recipe.cooking_time,
+        'pub_date': recipe.pub_date.isoformat(),
+        'tags': [tag.slug for tag in recipe.tags.all()],
+        'ingredients': [
+            {
+                'name': item.ingredient.name,
+                'measurement_unit': item.ingredient.measurement_unit,
+                'amount': item.amount,
+            }
+            for item in recipe.recipe_ingredients.all()
+        ],
+        'image': recipe.image.name,
+    }
+
+
+class Command(BaseCommand):
+    """Выгрузка рецептов в JSON Lines."""
+    help = (
+        'Выгружает рецепты с авторами, продуктами, тегами и картинками '
+        'в файл JSON Lines, по записи на строку'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file', required=True, help='Куда записать рецепты'
+        )
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument(
+            '--images',
+            choices=('path', 'base64'),
+            default='path',
+            help='Выгружать путь к картинке в хранилище или её содержимое'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=settings.IMAGE_WORKERS,
+            help='Сколько картинок читать параллельно'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл контрольной точки, по умолчанию <file>.checkpoint'
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Продолжить выгрузку с контрольной точки'
+        )
+
+    def handle(self, *args, **options):
+        checkpoint = checkpoint_path(options['file'], options['checkpoint'])
+        state = read_checkpoint(checkpoint) if options['resume'] else None
+        state = state or {'last_id': 0, 'offset': 0, 'exported': 0}
+        recipes = Recipes.objects.filter(
+            pk__gt=state['last_id']
+        ).select_related('author').prefetch_related(
+            Prefetch(
+                'recipe_ingredients',
+                queryset=IngredientsInRecipes.objects.select_related(
+                    'ingredient'
+                )
+            ),
+            'tags',
+        ).order_by('pk').iterator(chunk_size=options['chunk_size'])
+        started = time.monotonic()
+        mode = 'r+b' if state['offset'] else 'wb'
+        with open(options['file'], mode) as f, ThreadPoolExecutor(
+            options['workers']
+        ) as executor:
+            f.truncate(state['offset'])
+            f.seek(state['offset'])
+            for batch in chunked(recipes, options['chunk_size']):
+                self.write_batch(f, batch, executor, options, state)
+                write_checkpoint(checkpoint, state)
+        checkpoint.unlink(missing_ok=True)
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Выгружено {state["exported"]} рецептов в {options["file"]} '
+            f'за {elapsed:.1f} с'
+        ))
+
+    def write_batch(self, file, batch, executor, options, state):
+        records = [recipe_record(recipe) for recipe in batch]
+        if options['images'] == 'base64':
+            for record, data in zip(records, executor.map(
+                read_image, [record['image'] for record in records]
+            )):
+                record['image_data'] = data
+        file.writelines(
+            json.dumps(record, ensure_ascii=False).encode() + b'\n'
+            for record in records
+        )
+        file.flush()
+        state['last_id'] = batch[-1].pk
+        state['offset'] = file.tell()
+        state['exported'] += len(batch)
+        self.stdout.write(
+            f'Выгружено рецептов: {state["exported"]}', ending='\r'
+        )
@@ -0,0 +1,242 @@
+import random
+import time
+from datetime import timedelta
+from itertools import accumulate, islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from recipes.models import (
+    Favorites, Ingredients, IngredientsInRecipes, Recipes, ShoppingCart,
+    Subscription, Tags
+)
+
+User = get_user_model()
+
+FAKE_PASSWORD = 'fake-password'
+FAKE_IMAGE = 'recipes/images/fake.png'
+
+
+def chunked(items, size):
+    items = iter(items)
+    while batch := list(islice(items, size)):
+        yield batch
+
+
+class ZipfSampler:
+    """Выбор элементов с вероятностью, обратной рангу в степени s."""
+
+    def __init__(self, rng, population, exponent):
+        self.rng = rng
+        self.population = list(population)
+        rng.shuffle(self.population)
+        self.cum_weights = list(accumulate(
+            1 / rank ** exponent
+            for rank in range(1, len(self.population) + 1)
+        ))
+
+    def sample(self, count, exclude=None):
+        count = min(count, len(self.population) - (exclude is not None))
+        chosen = set()
+        while len(chosen) < count:
+            chosen.update(
+                item for item in self.rng.choices(
+                    self.population,
+                    cum_weights=self.cum_weights,
+                    k=count - len(chosen)
+                )
+                if item != exclude
+            )
+        return chosen
+
+
+class Command(BaseCommand):
+    """Генерация синтетических данных для нагрузочного тестирования."""
+    help = (
+        'Создаёт пользователей, рецепты, избранное, списки покупок '
+        'и подписки с распределением Ципфа'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=5000)
+        parser.add_argument(
+            '--favorites', type=int, default=20,
+            help='Среднее число избранных рецептов на пользователя'
+        )
+        parser.add_argument(
+            '--carts', type=int, default=5,
+            help='Среднее число рецептов в списке покупок пользователя'
+        )
+        parser.add_argument(
+            '--subscriptions', type=int, default=10,
+            help='Среднее число подписок на пользователя'
+        )
+        parser.add_argument('--min-ingredients', type=int, default=3)
+        parser.add_argument('--max-ingredients', type=int, default=12)
+        parser.add_argument(
+            '--zipf', type=float, default=1.1,
+            help='Показатель степени распределения Ципфа'
+        )
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько дней распределить даты публикации'
+        )
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument(
+            '--prefix', default='fake',
+            help='Префикс имён создаваемых пользователей'
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--ingredients-file',
+            default=str(settings.BASE_DIR / 'data' / 'ingredients.json'),
+            help='Откуда загрузить продукты, если их ещё нет в базе'
+        )
+        parser.add_argument(
+            '--tags-file',
+            default=str(settings.BASE_DIR / 'data' / 'tags.json'),
+            help='Откуда загрузить теги, если их ещё нет в базе'
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.options = options
+        self.batch_size = options['batch_size']
+        started = time.monotonic()
+        self.load_catalog()
+        users = self.create_users()
+        authors = ZipfSampler(self.rng, users, options['zipf'])
+        recipes = self.create_recipes(authors)
+        self.create_recipe_relations(recipes)
+        popular = ZipfSampler(self.rng, recipes, options['zipf'])
+        for model, mean in (
+            (Favorites, options['favorites']),
+            (ShoppingCart, options['carts']),
+        ):
+            self.bulk_create(
+                model,
+                (
+                    model(user_id=user_id, recipe_id=recipe_id)
+                    for user_id in users
+                    for recipe_id in popular.sample(self.count(mean))
+                ),
+            )
+        self.bulk_create(
+            Subscription,
+            (
+                Subscription(user_id=user_id, author_id=author_id)
+                for user_id in users
+                for author_id in authors.sample(
+                    self.count(options['subscriptions']), exclude=user_id
+                )
+            ),
+        )
+        call_command('rebuild_shopping_carts', stdout=self.stdout)
+        call_command('reconcile_counters', stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(
+            f'Данные созданы за {time.monotonic() - started:.1f} с'
+        ))
+
+    def count(self, mean):
+        return self.rng.randint(0, 2 * mean)
+
+    def bulk_create(self, model, objects):
+        ids = []
+        for batch in chunked(objects, self.batch_size):
+            ids.extend(item.pk for item in model.objects.bulk_create(batch))
+        self.stdout.write(f'{model._meta.verbose_name_plural}: {len(ids)}')
+        return ids
+
+    def load_catalog(self):
+        for model, command, option in (
+            (Ingredients, 'load_ingredients', 'ingredients_file'),
+            (Tags, 'load_tags', 'tags_file'),
+        ):
+            if not model.objects.exists():
+                call_command(
+                    command, file=self.options[option], stdout=self.stdout
+                )
+        if not Ingredients.objects.exists() or not Tags.objects.exists():
+            raise CommandError('Не удалось загрузить продукты и теги')
+
+    def create_users(self):
+        password = make_password(FAKE_PASSWORD)
+        prefix = f'{self.options["prefix"]}{self.options["seed"]}'
+        return self.bulk_create(
+            User,
+            (
+                User(
+                    username=f'{prefix}_{number}',
+                    email=f'{prefix}_{number}@example.com',
+                    first_name='Имя',
+                    last_name='Фамилия',
+                    password=password,
+                )
+                for number in range(self.options['users'])
+            ),
+        )
+
+    def create_recipes(self, authors):
+        recipes = self.bulk_create(
+            Recipes,
+            (
+                Recipes(
+                    author_id=author_id,
+                    name=f'Рецепт {number}',
+                    text='Сгенерированный рецепт',
+                    image=FAKE_IMAGE,
+                    cooking_time=self.rng.randint(5, 180),
+                )
+                for number in range(self.options['recipes'])
+                for author_id in authors.sample(1)
+            ),
+        )
+        now = timezone.now()
+        days = max(self.options['days'], 1)
+        bucket = max(len(recipes) // days, 1)
+        for start in range(0, len(recipes), bucket):
+            ids = recipes[start:start + bucket]
+            Recipes.objects.filter(id__range=(ids[0], ids[-1])).update(
+                pub_date=now - timedelta(
+                    days=days - start * days // len(recipes)
+                )
+            )
+        return recipes
+
+    def create_recipe_relations(self, recipes):
+        ingredients = ZipfSampler(
+            self.rng,
+            Ingredients.objects.values_list('id', flat=True),
+            self.options['zipf'],
+        )
+        tags = ZipfSampler(
+            self.rng, Tags.objects.values_list('id', flat=True), 1
+        )
+        self.bulk_create(
+            IngredientsInRecipes,
+            (
+                IngredientsInRecipes(
+                    recipe_id=recipe_id,
+                    ingredient_id=ingredient_id,
+                    amount=self.rng.randint(1, 500),
+                )
+                for recipe_id in recipes
+                for ingredient_id in ingredients.sample(self.rng.randint(
+                    self.options['min_ingredients'],
+                    self.options['max_ingredients'],
+                ))
+            ),
+        )
+        self.bulk_create(
+            Recipes.tags.through,
+            (
+                Recipes.tags.through(recipes_id=recipe_id, tags_id=tag_id)
+                for recipe_id in recipes
+                for tag_id in tags.sample(self.rng.randint(1, 3))
+            ),
+        )
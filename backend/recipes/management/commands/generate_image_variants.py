@@ -0,0 +1,69 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import F
+
+from recipes.images import (
+    generate_variants, has_variants, mark_variants, variants_field
+)
+from recipes.models import FoodUser, Recipes
+
+IMAGE_FIELDS = ((Recipes, 'image'), (FoodUser, 'avatar'))
+
+
+def images(force):
+    """Строки, для текущих файлов которых копии не отмечены."""
+    for model, field in IMAGE_FIELDS:
+        queryset = model.objects.exclude(**{field: ''})
+        if not force:
+            queryset = queryset.exclude(**{variants_field(field): F(field)})
+        for pk, name in queryset.values_list('pk', field).iterator():
+            yield model, pk, field, name
+
+
+class Command(BaseCommand):
+    """Создание уменьшенных копий для уже загруженных изображений."""
+    help = (
+        'Создаёт уменьшенные копии картинок рецептов и аватаров, '
+        'для которых их ещё нет, и отмечает их в базе'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Пересоздать копии, даже если они уже есть'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=settings.IMAGE_WORKERS
+        )
+
+    def handle(self, *args, **options):
+        rows = list(images(options['force']))
+        self.force = options['force']
+        failed = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            for row, error in zip(rows, pool.map(self.process, rows)):
+                if error:
+                    failed += 1
+                    self.stderr.write(
+                        self.style.ERROR(f'{row[-1]}: {error}')
+                    )
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано изображений: {len(rows) - failed}, '
+            f'ошибок: {failed}'
+        ))
+
+    def process(self, row):
+        model, pk, field, name = row
+        try:
+            if self.force or not has_variants(name):
+                generate_variants(name)
+            mark_variants(model, pk, field, name)
+        except (OSError, ValueError) as error:
+            return error
+        finally:
+            connection.close()
+        return None
@@ -0,0 +1,296 @@
+import json
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from recipes.management.commands.base_import import chunked
+from recipes.models import Ingredients, IngredientsInRecipes, Recipes, Tags
+from recipes.transfer import (
+    checkpoint_path, read_checkpoint, save_image, write_checkpoint
+)
+
+User = get_user_model()
+
+SKIP_REASONS = {
+    'invalid': 'некорректная запись',
+    'unknown_author': 'неизвестный автор',
+    'unknown_ingredient': 'неизвестный продукт',
+    'unknown_tag': 'неизвестный тег',
+    'duplicate': 'уже загружены',
+    'image_error': 'картинка не найдена',
+}
+
+
+TYPE_NAMES = {
+    str: 'непустой строкой', int: 'целым числом', list: 'непустым списком'
+}
+
+
+def read_records(file, line_number=0):
+    """Пары (номер строки, запись); нечитаемая строка даёт None."""
+    for line_number, line in enumerate(file, line_number + 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield line_number, record
+
+
+def value_error(value, kind, model_field=None):
+    if (
+        isinstance(value, bool) or not isinstance(value, kind)
+        or (kind is not int and not value)
+    ):
+        return f'должно быть {TYPE_NAMES[kind]}'
+    if model_field is not None:
+        try:
+            model_field.run_validators(value)
+        except ValidationError as error:
+            return ' '.join(error.messages)
+    return None
+
+
+def record_error(record):
+    """Первая ошибка в записи или None, если запись можно загружать."""
+    if not isinstance(record, dict):
+        return 'строка не является JSON-объектом'
+    for name, kind, model_field in (
+        ('author', str, None),
+        ('name', str, Recipes._meta.get_field('name')),
+        ('text', str, None),
+        ('cooking_time', int, Recipes._meta.get_field('cooking_time')),
+        ('tags', list, None),
+        ('ingredients', list, None),
+    ):
+        error = value_error(record.get(name), kind, model_field)
+        if error:
+            return f'{name}: {error}'
+    for name in ('image', 'image_data', 'pub_date'):
+        if record.get(name) and not isinstance(record[name], str):
+            return f'{name}: должно быть строкой'
+    if not (record.get('image') or record.get('image_data')):
+        return 'нет картинки'
+    try:
+        if record.get('pub_date') and not parse_datetime(
+            record['pub_date']
+        ):
+            raise ValueError
+    except ValueError:
+        return 'pub_date: некорректная дата'
+    for slug in record['tags']:
+        if value_error(slug, str):
+            return 'tags: слаги должны быть непустыми строками'
+    amount_field = IngredientsInRecipes._meta.get_field('amount')
+    for item in record['ingredients']:
+        if not isinstance(item, dict):
+            return 'ingredients: элементы должны быть объектами'
+        for name, kind, model_field in (
+            ('name', str, None),
+            ('measurement_unit', str, None),
+            ('amount', int, amount_field),
+        ):
+            error = value_error(item.get(name), kind, model_field)
+            if error:
+                return f'ingredients.{name}: {error}'
+    return None
+
+
+class Command(BaseCommand):
+    """Загрузка рецептов из JSON Lines, выгруженных export_recipes."""
+    help = (
+        'Загружает рецепты из файла JSON Lines пачками; авторы ищутся '
+        'по email, продукты по названию и единице, теги по слагу'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file', required=True, help='Файл, выгруженный export_recipes'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Сколько рецептов записывать в одной транзакции'
+        )
+        parser.add_argument(
+            '--images-from',
+            help='Медиа-каталог источника, откуда копировать картинки'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=settings.IMAGE_WORKERS,
+            help='Сколько картинок копировать параллельно'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл контрольной точки, по умолчанию <file>.checkpoint'
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Продолжить загрузку с контрольной точки'
+        )
+
+    def handle(self, *args, **options):
+        checkpoint = checkpoint_path(options['file'], options['checkpoint'])
+        state = read_checkpoint(checkpoint) if options['resume'] else None
+        state = state or {
+            'offset': 0, 'line': 0, 'imported': 0, 'skipped': {}
+        }
+        self.skipped = Counter(state['skipped'])
+        self.options = options
+        self.ingredients = {
+            (name, unit): pk for pk, name, unit in
+            Ingredients.objects.values_list('pk', 'name', 'measurement_unit')
+        }
+        self.tags = dict(Tags.objects.values_list('slug', 'pk'))
+        started = time.monotonic()
+        try:
+            with open(options['file'], 'rb') as f, ThreadPoolExecutor(
+                options['workers']
+            ) as executor:
+                f.seek(state['offset'])
+                records = read_records(f, state.get('line', 0))
+                for batch in chunked(records, options['batch_size']):
+                    with transaction.atomic():
+                        state['imported'] += self.import_batch(
+                            batch, executor
+                        )
+                    state['offset'] = f.tell()
+                    state['line'] = batch[-1][0]
+                    state['skipped'] = dict(self.skipped)
+                    write_checkpoint(checkpoint, state)
+                    self.stdout.write(
+                        f'Загружено рецептов: {state["imported"]}',
+                        ending='\r'
+                    )
+        except OSError as error:
+            raise CommandError(
+                f'Не удалось прочитать {options["file"]}: {error}'
+            )
+        checkpoint.unlink(missing_ok=True)
+        call_command('reconcile_counters', stdout=self.stdout)
+        for reason, count in self.skipped.items():
+            self.stdout.write(f'Пропущено ({SKIP_REASONS[reason]}): {count}')
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено {state["imported"]} рецептов из {options["file"]} '
+            f'за {elapsed:.1f} с'
+        ))
+
+    def skip(self, line, reason, detail=None):
+        self.skipped[reason] += 1
+        if reason != 'duplicate':
+            self.stderr.write(
+                f'Строка {line}: {SKIP_REASONS[reason]}'
+                + (f' ({detail})' if detail else '')
+            )
+
+    def resolve(self, batch):
+        """Связи записей по естественным ключам; неполные пропускаются."""
+        records = []
+        for line, record in batch:
+            error = record_error(record)
+            if error:
+                self.skip(line, 'invalid', error)
+            else:
+                records.append((line, record))
+        authors = User.objects.in_bulk(
+            {record['author'] for _, record in records}, field_name='email'
+        )
+        rows = []
+        for line, record in records:
+            author = authors.get(record['author'])
+            ingredients = {
+                self.ingredients.get(
+                    (item.get('name'), item.get('measurement_unit'))
+                ): item['amount']
+                for item in record['ingredients']
+            }
+            tags = {self.tags.get(slug) for slug in record['tags']}
+            if author is None:
+                self.skip(line, 'unknown_author', record['author'])
+            elif None in ingredients:
+                self.skip(line, 'unknown_ingredient')
+            elif None in tags:
+                self.skip(line, 'unknown_tag')
+            else:
+                rows.append((
+                    line,
+                    record,
+                    author,
+                    parse_datetime(record.get('pub_date') or '')
+                    or timezone.now(),
+                    ingredients,
+                    tags,
+                ))
+        return rows
+
+    def exclude_existing(self, rows):
+        """Повторная загрузка не создаёт копий рецептов."""
+        seen = set(Recipes.objects.filter(
+            author__in={author for _, _, author, *_ in rows},
+            name__in={record['name'] for _, record, *_ in rows},
+        ).values_list('author_id', 'name', 'pub_date'))
+        new_rows = []
+        for row in rows:
+            line, record, author, pub_date, *_ = row
+            key = (author.id, record['name'], pub_date)
+            if key in seen:
+                self.skip(line, 'duplicate')
+                continue
+            seen.add(key)
+            new_rows.append(row)
+        return new_rows
+
+    def copy_image(self, record):
+        try:
+            return save_image(record, self.options['images_from'])
+        except (OSError, ValueError):
+            return None
+
+    def import_batch(self, batch, executor):
+        rows = self.exclude_existing(self.resolve(batch))
+        images = executor.map(self.copy_image, [row[1] for row in rows])
+        recipes, relations = [], []
+        for (line, record, author, pub_date, ingredients, tags), image in zip(
+            rows, images
+        ):
+            if image is None:
+                self.skip(line, 'image_error')
+                continue
+            recipes.append(Recipes(
+                author=author,
+                name=record['name'],
+                text=record['text'],
+                cooking_time=record['cooking_time'],
+                image=image,
+            ))
+            relations.append((pub_date, ingredients, tags))
+        Recipes.objects.bulk_create(recipes)
+        for recipe, (pub_date, _, _) in zip(recipes, relations):
+            recipe.pub_date = pub_date
+        Recipes.objects.bulk_update(recipes, ['pub_date'])
+        IngredientsInRecipes.objects.bulk_create(
+            IngredientsInRecipes(
+                recipe=recipe, ingredient_id=ingredient_id, amount=amount
+            )
+            for recipe, (_, ingredients, _) in zip(recipes, relations)
+            for ingredient_id, amount in ingredients.items()
+        )
+        Recipes.tags.through.objects.bulk_create(
+            Recipes.tags.through(recipes=recipe, tags_id=tag_id)
+            for recipe, (_, _, tags) in zip(recipes, relations)
+            for tag_id in tags
+        )
+        return len(recipes)
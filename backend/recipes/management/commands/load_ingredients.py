@@ -3,5 +3,6 @@ from recipes.management.commands.base_import import BaseImportCommand
 
 
 class Command(BaseImportCommand):
-    help = 'Загружает продукты из JSON-файла'
+    help = 'Загружает продукты из JSON- или CSV-файла'
     model = Ingredients
+    unique_fields = ('name', 'measurement_unit')
@@ -3,5 +3,8 @@ from recipes.management.commands.base_import import BaseImportCommand
 
 
 class Command(BaseImportCommand):
-    help = 'Загружает теги из JSON-файла'
+    help = 'Загружает теги из JSON- или CSV-файла'
     model = Tags
+    unique_fields = ('slug',)
+    update_fields = ('name',)
+    conflict_fields = ('name',)
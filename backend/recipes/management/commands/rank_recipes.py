@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from recipes.constant import TRENDING_HALF_LIFE_HOURS, TRENDING_WINDOW_DAYS
+from recipes.ranking import rank_recipes
+
+
+class Command(BaseCommand):
+    """Пересчёт рейтингов для сортировок popular и trending."""
+    help = (
+        'Пересчитывает рейтинги рецептов по добавлениям в избранное '
+        'и списки покупок; запускается периодически'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--half-life', type=float, default=TRENDING_HALF_LIFE_HOURS,
+            help='За сколько часов вес добавления в тренде убывает вдвое'
+        )
+        parser.add_argument(
+            '--window', type=int, default=TRENDING_WINDOW_DAYS,
+            help='За сколько последних дней учитывать добавления в тренде'
+        )
+
+    def handle(self, *args, **options):
+        count = rank_recipes(
+            half_life_hours=options['half_life'],
+            window_days=options['window'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Рейтинги пересчитаны ({count} рецептов)'
+        ))
@@ -0,0 +1,79 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from recipes.management.commands.base_import import chunked
+from recipes.models import ShoppingCartIngredients
+
+BATCH_SIZE = 1000
+
+
+def count_mismatches(expected, stored):
+    """Сравнивает два отсортированных по (user, ingredient) потока строк."""
+    expected, stored = iter(expected), iter(stored)
+    left, right = next(expected, None), next(stored, None)
+    mismatches = 0
+    while left is not None or right is not None:
+        if right is None or (left is not None and left[:2] < right[:2]):
+            mismatches += 1
+            left = next(expected, None)
+        elif left is None or right[:2] < left[:2]:
+            mismatches += 1
+            right = next(stored, None)
+        else:
+            mismatches += left[2] != right[2]
+            left, right = next(expected, None), next(stored, None)
+    return mismatches
+
+
+class Command(BaseCommand):
+    """Пересчёт сводной таблицы продуктов в списках покупок."""
+    help = (
+        'Пересобирает или проверяет сводную таблицу продуктов '
+        'в списках покупок'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Только сравнить таблицу с данными корзин, не изменяя её'
+        )
+
+    def handle(self, *args, **options):
+        expected = ShoppingCartIngredients.objects.expected_amounts().iterator(
+            chunk_size=BATCH_SIZE
+        )
+        if options['verify']:
+            mismatches = count_mismatches(
+                expected,
+                ShoppingCartIngredients.objects.order_by(
+                    'user_id', 'ingredient_id'
+                ).values_list(
+                    'user_id', 'ingredient_id', 'amount'
+                ).iterator(chunk_size=BATCH_SIZE),
+            )
+            if mismatches:
+                raise CommandError(
+                    f'Расхождений в списках покупок: {mismatches}'
+                )
+            self.stdout.write(self.style.SUCCESS(
+                'Списки покупок совпадают '
+                f'({ShoppingCartIngredients.objects.count()} записей)'
+            ))
+            return
+        created = 0
+        with transaction.atomic():
+            ShoppingCartIngredients.objects.all().delete()
+            for batch in chunked(expected, BATCH_SIZE):
+                ShoppingCartIngredients.objects.bulk_create(
+                    ShoppingCartIngredients(
+                        user_id=user_id,
+                        ingredient_id=ingredient_id,
+                        amount=amount,
+                    )
+                    for user_id, ingredient_id, amount in batch
+                )
+                created += len(batch)
+        self.stdout.write(self.style.SUCCESS(
+            f'Списки покупок пересобраны ({created} записей)'
+        ))
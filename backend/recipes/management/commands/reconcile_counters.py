@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from recipes.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    """Пересчёт денормализованных счётчиков."""
+    help = (
+        'Исправляет или проверяет счётчики рецептов, избранного, '
+        'списков покупок и подписок'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Только найти расхождения, не изменяя счётчики'
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            drift = reconcile_counters(fix=not options['verify'])
+        for counter, count in drift.items():
+            if count:
+                self.stdout.write(f'{counter}: расхождений {count}')
+        total = sum(drift.values())
+        if options['verify'] and total:
+            raise CommandError(f'Расхождений в счётчиках: {total}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Счётчики исправлены ({total} записей)' if total
+            else 'Счётчики совпадают'
+        ))
@@ -0,0 +1,76 @@
+# Generated by Django 4.2 on 2026-10-18 05:43
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_shopping_cart_ingredients(apps, schema_editor):
+    IngredientsInRecipes = apps.get_model("recipes", "IngredientsInRecipes")
+    ShoppingCartIngredients = apps.get_model("recipes", "ShoppingCartIngredients")
+    ShoppingCartIngredients.objects.bulk_create(
+        ShoppingCartIngredients(
+            user_id=user_id, ingredient_id=ingredient_id, amount=amount
+        )
+        for user_id, ingredient_id, amount in (
+            IngredientsInRecipes.objects.filter(recipe__shopping_carts__isnull=False)
+            .values_list("recipe__shopping_carts__user", "ingredient")
+            .annotate(total_amount=models.Sum("amount"))
+            .order_by()
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0024_alter_ingredientsinrecipes_ingredient_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ShoppingCartIngredients",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("amount", models.PositiveIntegerField(verbose_name="Количество")),
+                (
+                    "ingredient",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="recipes.ingredients",
+                        verbose_name="Продукт",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Пользователь",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Продукт в списке покупок",
+                "verbose_name_plural": "Продукты в списках покупок",
+                "default_related_name": "shopping_cart_ingredients",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="shoppingcartingredients",
+            constraint=models.UniqueConstraint(
+                fields=("user", "ingredient"), name="unique_shopping_cart_ingredient"
+            ),
+        ),
+        migrations.RunPython(
+            build_shopping_cart_ingredients, migrations.RunPython.noop
+        ),
+    ]
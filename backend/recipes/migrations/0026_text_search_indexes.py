@@ -0,0 +1,60 @@
+# Generated by Django 4.2 on 2026-10-18 05:45
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+TRIGRAM_INDEXES = (
+    ("fooduser_username_trgm", "recipes_fooduser", "username"),
+    ("ingredients_name_trgm", "recipes_ingredients", "name"),
+    ("recipes_name_trgm", "recipes_recipes", "name"),
+)
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" '
+            f'USING gin (UPPER("{column}"::text) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, _, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0025_shoppingcartingredients"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="fooduser",
+            index=models.Index(
+                django.db.models.functions.text.Upper("username"),
+                name="fooduser_username_upper",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ingredients",
+            index=models.Index(
+                django.db.models.functions.text.Upper("name"),
+                name="ingredients_name_upper",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="recipes",
+            index=models.Index(
+                django.db.models.functions.text.Upper("name"), name="recipes_name_upper"
+            ),
+        ),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-18 05:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0026_text_search_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="recipes",
+            index=models.Index(fields=["-pub_date", "-id"], name="recipes_pub_date_id"),
+        ),
+    ]
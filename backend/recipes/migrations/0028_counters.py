@@ -0,0 +1,94 @@
+# Generated by Django 4.2 on 2026-10-18 06:01
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+COUNTERS = (
+    ("Recipes", "favorites_count", "Favorites", "recipe"),
+    ("Recipes", "in_carts_count", "ShoppingCart", "recipe"),
+    ("FoodUser", "recipes_count", "Recipes", "author"),
+    ("FoodUser", "followers_count", "Subscription", "author"),
+    ("FoodUser", "following_count", "Subscription", "user"),
+    ("Ingredients", "recipes_count", "IngredientsInRecipes", "ingredient"),
+    ("Tags", "recipes_count", "Recipes_tags", "tags"),
+)
+
+
+def fill_counters(apps, schema_editor):
+    for model_name, field, related_name, fk in COUNTERS:
+        related = apps.get_model("recipes", related_name)
+        apps.get_model("recipes", model_name).objects.update(
+            **{
+                field: Coalesce(
+                    Subquery(
+                        related.objects.filter(**{fk: OuterRef("pk")})
+                        .order_by()
+                        .values(fk)
+                        .annotate(count=Count("pk"))
+                        .values("count")
+                    ),
+                    0,
+                )
+            }
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0027_recipes_pub_date_id"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="fooduser",
+            name="followers_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Подписчиков"
+            ),
+        ),
+        migrations.AddField(
+            model_name="fooduser",
+            name="following_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Подписок"
+            ),
+        ),
+        migrations.AddField(
+            model_name="fooduser",
+            name="recipes_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Рецептов"
+            ),
+        ),
+        migrations.AddField(
+            model_name="ingredients",
+            name="recipes_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="В рецептах"
+            ),
+        ),
+        migrations.AddField(
+            model_name="recipes",
+            name="favorites_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="В избранном"
+            ),
+        ),
+        migrations.AddField(
+            model_name="recipes",
+            name="in_carts_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="В списках покупок"
+            ),
+        ),
+        migrations.AddField(
+            model_name="tags",
+            name="recipes_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="В рецептах"
+            ),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
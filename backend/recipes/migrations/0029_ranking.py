@@ -0,0 +1,86 @@
+# Generated by Django 4.2 on 2026-10-18 06:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0028_counters"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RecipeRanking",
+            fields=[
+                (
+                    "recipe",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="ranking",
+                        serialize=False,
+                        to="recipes.recipes",
+                        verbose_name="Рецепт",
+                    ),
+                ),
+                (
+                    "popular_score",
+                    models.FloatField(default=0, verbose_name="Популярность"),
+                ),
+                ("trending_score", models.FloatField(default=0, verbose_name="Тренд")),
+                ("computed_at", models.DateTimeField(verbose_name="Дата расчёта")),
+            ],
+            options={
+                "verbose_name": "Рейтинг рецепта",
+                "verbose_name_plural": "Рейтинги рецептов",
+            },
+        ),
+        migrations.AddField(
+            model_name="favorites",
+            name="added_at",
+            field=models.DateTimeField(
+                db_index=True, null=True, verbose_name="Дата добавления"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="favorites",
+            name="added_at",
+            field=models.DateTimeField(
+                auto_now_add=True,
+                db_index=True,
+                null=True,
+                verbose_name="Дата добавления",
+            ),
+        ),
+        migrations.AddField(
+            model_name="shoppingcart",
+            name="added_at",
+            field=models.DateTimeField(
+                db_index=True, null=True, verbose_name="Дата добавления"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="shoppingcart",
+            name="added_at",
+            field=models.DateTimeField(
+                auto_now_add=True,
+                db_index=True,
+                null=True,
+                verbose_name="Дата добавления",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="reciperanking",
+            index=models.Index(
+                fields=["-popular_score", "-recipe"], name="ranking_popular"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="reciperanking",
+            index=models.Index(
+                fields=["-trending_score", "-recipe"], name="ranking_trending"
+            ),
+        ),
+    ]
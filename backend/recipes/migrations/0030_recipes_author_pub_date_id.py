@@ -0,0 +1,19 @@
+# Generated by Django 4.2 on 2026-10-18 06:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0029_ranking"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="recipes",
+            index=models.Index(
+                fields=["author", "-pub_date", "-id"], name="recipes_author_pub_date_id"
+            ),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2 on 2026-10-18 06:40
+
+from django.db import migrations
+
+
+PATTERN_INDEXES = (
+    ("fooduser_username_upper_pattern", "recipes_fooduser", "username"),
+    ("ingredients_name_upper_pattern", "recipes_ingredients", "name"),
+    ("recipes_name_upper_pattern", "recipes_recipes", "name"),
+)
+
+
+def create_pattern_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, table, column in PATTERN_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" '
+            f'(UPPER("{column}"::text) text_pattern_ops)'
+        )
+
+
+def drop_pattern_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, _, _ in PATTERN_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0030_recipes_author_pub_date_id"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_pattern_indexes, drop_pattern_indexes),
+    ]
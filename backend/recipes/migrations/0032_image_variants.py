@@ -0,0 +1,33 @@
+# Generated by Django 4.2 on 2026-10-18 06:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0031_text_pattern_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="fooduser",
+            name="avatar_variants",
+            field=models.CharField(
+                blank=True,
+                editable=False,
+                max_length=100,
+                verbose_name="Копии аватара созданы для",
+            ),
+        ),
+        migrations.AddField(
+            model_name="recipes",
+            name="image_variants",
+            field=models.CharField(
+                blank=True,
+                editable=False,
+                max_length=100,
+                verbose_name="Копии картинки созданы для",
+            ),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2 on 2026-10-18 06:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0032_image_variants"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CatalogVersion",
+            fields=[
+                (
+                    "name",
+                    models.CharField(
+                        max_length=64,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="Справочник",
+                    ),
+                ),
+                ("version", models.CharField(max_length=32, verbose_name="Версия")),
+            ],
+            options={
+                "verbose_name": "Версия справочника",
+                "verbose_name_plural": "Версии справочников",
+            },
+        ),
+    ]
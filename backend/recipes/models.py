@@ -1,15 +1,18 @@
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MinValueValidator, RegexValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Greatest, Upper
 
 from .constant import (
-    EMAIL_MAX_LENGTH, FIRST_NAME_MAX_LENGTH,
+    CATALOG_NAME_MAX_LENGTH, EMAIL_MAX_LENGTH, FIRST_NAME_MAX_LENGTH,
     INGREDIENTS_NAME_MAX_LENGTH, LAST_NAME_MAX_LENGTH,
     MEASUREMENT_UNIT_MAX_LENGTH, RECIPES_MAX_LENGTH,
     SLUG_MAX_LENGTH, TAG_MAX_LENGTH, USERNAME_MAX_LENGTH,
     USERNAME_PATTERN
 )
+from .counters import counter_fields
 
 
 def user_avatar_path(instance, filename):
@@ -17,7 +20,34 @@ def user_avatar_path(instance, filename):
     return f'users/avatars/user_{instance.id}/avatar.{ext}'
 
 
-class FoodUser(AbstractUser):
+class CountersModel(models.Model):
+    """Модель со счётчиками, которые меняются только через F().
+
+    Полное сохранение не записывает счётчики: в загруженном раньше
+    экземпляре они могли устареть.
+    """
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if (
+            not self._state.adding
+            and not args
+            and kwargs.get('update_fields') is None
+            and not kwargs.get('force_insert')
+        ):
+            skipped = {
+                *counter_fields(type(self)), *self.get_deferred_fields()
+            }
+            kwargs['update_fields'] = [
+                field.attname for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in skipped
+            ]
+        super().save(*args, **kwargs)
+
+
+class FoodUser(CountersModel, AbstractUser):
     username = models.CharField(
         unique=True,
         max_length=USERNAME_MAX_LENGTH,
@@ -36,6 +66,19 @@ class FoodUser(AbstractUser):
     )
     last_name = models.CharField('Фамилия', max_length=LAST_NAME_MAX_LENGTH)
     avatar = models.ImageField(upload_to=user_avatar_path)
+    avatar_variants = models.CharField(
+        'Копии аватара созданы для', max_length=100, blank=True,
+        editable=False
+    )
+    recipes_count = models.PositiveIntegerField(
+        'Рецептов', default=0, editable=False
+    )
+    followers_count = models.PositiveIntegerField(
+        'Подписчиков', default=0, editable=False
+    )
+    following_count = models.PositiveIntegerField(
+        'Подписок', default=0, editable=False
+    )
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = [
@@ -48,12 +91,15 @@ class FoodUser(AbstractUser):
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
         ordering = ('-username',)
+        indexes = [
+            models.Index(Upper('username'), name='fooduser_username_upper'),
+        ]
 
     def __str__(self):
         return self.username
 
 
-class Tags(models.Model):
+class Tags(CountersModel):
     name = models.CharField(
         unique=True, max_length=TAG_MAX_LENGTH, verbose_name='Название'
     )
@@ -62,6 +108,9 @@ class Tags(models.Model):
         max_length=SLUG_MAX_LENGTH,
         verbose_name='Слаг',
     )
+    recipes_count = models.PositiveIntegerField(
+        'В рецептах', default=0, editable=False
+    )
 
     class Meta:
         verbose_name = 'Тег'
@@ -72,7 +121,7 @@ class Tags(models.Model):
         return self.name
 
 
-class Ingredients(models.Model):
+class Ingredients(CountersModel):
     name = models.CharField(
         max_length=INGREDIENTS_NAME_MAX_LENGTH, verbose_name='Название'
     )
@@ -80,6 +129,9 @@ class Ingredients(models.Model):
         max_length=MEASUREMENT_UNIT_MAX_LENGTH,
         verbose_name='Единица измерения'
     )
+    recipes_count = models.PositiveIntegerField(
+        'В рецептах', default=0, editable=False
+    )
 
     class Meta:
         verbose_name = 'Продукт'
@@ -91,12 +143,15 @@ class Ingredients(models.Model):
                 name='unique_ingredient'
             )
         ]
+        indexes = [
+            models.Index(Upper('name'), name='ingredients_name_upper'),
+        ]
 
     def __str__(self):
         return f'{self.name}, {self.measurement_unit}'
 
 
-class Recipes(models.Model):
+class Recipes(CountersModel):
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -115,6 +170,10 @@ class Recipes(models.Model):
     image = models.ImageField(
         upload_to='recipes/images/', verbose_name='Картинка'
     )
+    image_variants = models.CharField(
+        'Копии картинки созданы для', max_length=100, blank=True,
+        editable=False
+    )
     cooking_time = models.PositiveIntegerField(
         verbose_name='Время (мин)',
         validators=[MinValueValidator(1)]
@@ -122,12 +181,28 @@ class Recipes(models.Model):
     pub_date = models.DateTimeField(
         auto_now_add=True, verbose_name='Дата публикации рецепта'
     )
+    favorites_count = models.PositiveIntegerField(
+        'В избранном', default=0, editable=False
+    )
+    in_carts_count = models.PositiveIntegerField(
+        'В списках покупок', default=0, editable=False
+    )
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         default_related_name = 'recipes'
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(Upper('name'), name='recipes_name_upper'),
+            models.Index(
+                fields=['-pub_date', '-id'], name='recipes_pub_date_id'
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='recipes_author_pub_date_id'
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -193,6 +268,36 @@ class Subscription(models.Model):
         return f'{self.user.username} follows {self.author.username}'
 
 
+class RecipeRanking(models.Model):
+    recipe = models.OneToOneField(
+        Recipes,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='ranking',
+        verbose_name='Рецепт',
+    )
+    popular_score = models.FloatField('Популярность', default=0)
+    trending_score = models.FloatField('Тренд', default=0)
+    computed_at = models.DateTimeField('Дата расчёта')
+
+    class Meta:
+        verbose_name = 'Рейтинг рецепта'
+        verbose_name_plural = 'Рейтинги рецептов'
+        indexes = [
+            models.Index(
+                fields=['-popular_score', '-recipe'],
+                name='ranking_popular'
+            ),
+            models.Index(
+                fields=['-trending_score', '-recipe'],
+                name='ranking_trending'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.recipe_id}: {self.popular_score:.1f}'
+
+
 class UserRecipeBaseModel(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -204,6 +309,10 @@ class UserRecipeBaseModel(models.Model):
         on_delete=models.CASCADE,
         verbose_name='Рецепт'
     )
+    added_at = models.DateTimeField(
+        auto_now_add=True, null=True, db_index=True,
+        verbose_name='Дата добавления'
+    )
 
     class Meta:
         abstract = True
@@ -230,3 +339,130 @@ class ShoppingCart(UserRecipeBaseModel):
         verbose_name = 'Список покупок'
         verbose_name_plural = 'Списки покупок'
         default_related_name = 'shopping_carts'
+
+
+class ShoppingCartIngredientsManager(models.Manager):
+    @transaction.atomic
+    def apply_amounts(self, user_ids, amounts):
+        """Прибавляет amounts к спискам покупок пользователей user_ids.
+
+        Недостающие строки вставляются с ignore_conflicts, количества
+        меняются через F(), а строки блокируются в одном порядке, поэтому
+        параллельные транзакции не падают на уникальности и не встают
+        во взаимную блокировку.
+        """
+        amounts = {
+            ingredient_id: delta
+            for ingredient_id, delta in sorted(amounts.items()) if delta
+        }
+        user_ids = sorted(set(user_ids))
+        if not user_ids or not amounts:
+            return
+        self.bulk_create(
+            [
+                self.model(
+                    user_id=user_id, ingredient_id=ingredient_id, amount=0
+                )
+                for user_id in user_ids
+                for ingredient_id, delta in amounts.items() if delta > 0
+            ],
+            ignore_conflicts=True,
+        )
+        items = self.filter(user_id__in=user_ids, ingredient_id__in=amounts)
+        list(items.select_for_update().order_by(
+            'user_id', 'ingredient_id'
+        ).values_list('pk', flat=True))
+        items.update(amount=Greatest(
+            F('amount') + Case(*(
+                When(ingredient_id=ingredient_id, then=Value(delta))
+                for ingredient_id, delta in amounts.items()
+            )),
+            Value(0),
+        ))
+        if any(delta < 0 for delta in amounts.values()):
+            items.filter(amount=0).delete()
+
+    @staticmethod
+    def recipe_amounts(recipe):
+        return dict(
+            IngredientsInRecipes.objects.filter(
+                recipe=recipe
+            ).values_list('ingredient_id', 'amount')
+        )
+
+    def add_recipe(self, user_id, recipe):
+        self.apply_amounts([user_id], self.recipe_amounts(recipe))
+
+    def remove_recipe(self, user_id, recipe):
+        self.apply_amounts([user_id], {
+            ingredient_id: -amount
+            for ingredient_id, amount in self.recipe_amounts(recipe).items()
+        })
+
+    def change_recipe(self, recipe, old_amounts, new_amounts):
+        self.apply_amounts(
+            list(ShoppingCart.objects.filter(
+                recipe=recipe
+            ).values_list('user_id', flat=True)),
+            {
+                ingredient_id: (
+                    new_amounts.get(ingredient_id, 0)
+                    - old_amounts.get(ingredient_id, 0)
+                )
+                for ingredient_id in {*old_amounts, *new_amounts}
+            }
+        )
+
+    @staticmethod
+    def expected_amounts():
+        return (
+            IngredientsInRecipes.objects.filter(
+                recipe__shopping_carts__isnull=False
+            )
+            .values_list('recipe__shopping_carts__user', 'ingredient')
+            .annotate(total_amount=models.Sum('amount'))
+            .order_by('recipe__shopping_carts__user_id', 'ingredient_id')
+        )
+
+
+class ShoppingCartIngredients(models.Model):
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        verbose_name='Пользователь'
+    )
+    ingredient = models.ForeignKey(
+        Ingredients, on_delete=models.CASCADE, verbose_name='Продукт'
+    )
+    amount = models.PositiveIntegerField(verbose_name='Количество')
+
+    objects = ShoppingCartIngredientsManager()
+
+    class Meta:
+        verbose_name = 'Продукт в списке покупок'
+        verbose_name_plural = 'Продукты в списках покупок'
+        default_related_name = 'shopping_cart_ingredients'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'],
+                name='unique_shopping_cart_ingredient'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.user} -> {self.ingredient}: {self.amount}'
+
+
+class CatalogVersion(models.Model):
+    """Версия справочника в базе, общая для всех процессов."""
+    name = models.CharField(
+        'Справочник', max_length=CATALOG_NAME_MAX_LENGTH, primary_key=True
+    )
+    version = models.CharField('Версия', max_length=32)
+
+    class Meta:
+        verbose_name = 'Версия справочника'
+        verbose_name_plural = 'Версии справочников'
+
+    def __str__(self):
+        return f'{self.name}: {self.version}'
@@ -0,0 +1,81 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .constant import (
+    CART_RANK_WEIGHT, FAVORITE_RANK_WEIGHT, TRENDING_HALF_LIFE_HOURS,
+    TRENDING_WINDOW_DAYS
+)
+from .models import Favorites, RecipeRanking, Recipes, ShoppingCart
+
+CHUNK_SIZE = 2000
+RANKING_FIELDS = {
+    'popular': 'popular_score',
+    'trending': 'trending_score',
+}
+
+
+def popular_scores():
+    """Взвешенное число добавлений в избранное и списки покупок."""
+    return {
+        pk: FAVORITE_RANK_WEIGHT * favorites + CART_RANK_WEIGHT * carts
+        for pk, favorites, carts in Recipes.objects.filter(
+            Q(favorites_count__gt=0) | Q(in_carts_count__gt=0)
+        ).values_list(
+            'pk', 'favorites_count', 'in_carts_count'
+        ).iterator(chunk_size=CHUNK_SIZE)
+    }
+
+
+def trending_scores(now, half_life_hours=TRENDING_HALF_LIFE_HOURS,
+                    window_days=TRENDING_WINDOW_DAYS):
+    """Добавления за окно, вес каждого убывает вдвое за half_life_hours.
+
+    Добавления без даты (сделанные до появления added_at) не учитываются.
+    """
+    scores = defaultdict(float)
+    since = now - timedelta(days=window_days)
+    for model, weight in (
+        (Favorites, FAVORITE_RANK_WEIGHT),
+        (ShoppingCart, CART_RANK_WEIGHT),
+    ):
+        for recipe_id, added_at in model.objects.filter(
+            added_at__gte=since
+        ).values_list('recipe_id', 'added_at').iterator(
+            chunk_size=CHUNK_SIZE
+        ):
+            age = (now - added_at).total_seconds() / 3600
+            scores[recipe_id] += weight * 0.5 ** (age / half_life_hours)
+    return scores
+
+
+@transaction.atomic
+def rank_recipes(now=None, **trending_options):
+    """Пересчитывает таблицу рейтингов, возвращает число рецептов в ней.
+
+    Рецепты без добавлений в таблицу не попадают.
+    """
+    now = now or timezone.now()
+    popular = popular_scores()
+    trending = trending_scores(now, **trending_options)
+    rankings = [
+        RecipeRanking(
+            recipe_id=recipe_id,
+            popular_score=popular.get(recipe_id, 0),
+            trending_score=trending.get(recipe_id, 0),
+            computed_at=now,
+        )
+        for recipe_id in {*popular, *trending}
+    ]
+    RecipeRanking.objects.bulk_create(
+        rankings,
+        batch_size=CHUNK_SIZE,
+        update_conflicts=True,
+        unique_fields=['recipe'],
+        update_fields=['popular_score', 'trending_score', 'computed_at'],
+    )
+    RecipeRanking.objects.filter(computed_at__lt=now).delete()
+    return len(rankings)
@@ -0,0 +1,104 @@
+import hashlib
+import hmac
+from collections import OrderedDict
+from functools import lru_cache
+from math import gcd
+from threading import Lock
+
+from django.conf import settings
+
+from .constant import (
+    SHORT_CODE_ALPHABET, SHORT_CODE_CHECK_LENGTH, SHORT_CODE_LENGTH
+)
+
+BASE = len(SHORT_CODE_ALPHABET)
+MODULUS = BASE ** SHORT_CODE_LENGTH
+
+
+def to_base(number, length):
+    digits = []
+    for _ in range(length):
+        number, digit = divmod(number, BASE)
+        digits.append(SHORT_CODE_ALPHABET[digit])
+    return ''.join(reversed(digits))
+
+
+def from_base(code):
+    number = 0
+    for char in code:
+        number = number * BASE + SHORT_CODE_ALPHABET.index(char)
+    return number
+
+
+def sign(message):
+    return hmac.new(
+        settings.SHORT_LINK_SECRET.encode(), message.encode(), hashlib.sha256
+    ).digest()
+
+
+@lru_cache
+def get_permutation():
+    """Множитель и сдвиг перестановки id, выведенные из секрета."""
+    digest = sign('permutation')
+    multiplier = int.from_bytes(digest[:8], 'big') % MODULUS
+    while gcd(multiplier, MODULUS) != 1:
+        multiplier += 1
+    offset = int.from_bytes(digest[8:16], 'big') % MODULUS
+    return multiplier, pow(multiplier, -1, MODULUS), offset
+
+
+def checksum(pk):
+    return to_base(
+        int.from_bytes(sign(str(pk))[:8], 'big'), SHORT_CODE_CHECK_LENGTH
+    )
+
+
+def encode(pk):
+    """Короткий код рецепта: переставленный id и контрольная сумма."""
+    if not 0 < pk < MODULUS:
+        raise ValueError(f'id={pk} нельзя закодировать')
+    multiplier, _, offset = get_permutation()
+    return (
+        to_base((pk * multiplier + offset) % MODULUS, SHORT_CODE_LENGTH)
+        + checksum(pk)
+    )
+
+
+def decode(code):
+    """id рецепта по короткому коду или None, если код неверный."""
+    if (
+        len(code) != SHORT_CODE_LENGTH + SHORT_CODE_CHECK_LENGTH
+        or not set(code) <= set(SHORT_CODE_ALPHABET)
+    ):
+        return None
+    _, inverse, offset = get_permutation()
+    pk = (
+        (from_base(code[:SHORT_CODE_LENGTH]) - offset) * inverse % MODULUS
+    )
+    if pk == 0 or not hmac.compare_digest(
+        code[SHORT_CODE_LENGTH:], checksum(pk)
+    ):
+        return None
+    return pk
+
+
+class DeletedIds:
+    """Ограниченный LRU id удалённых рецептов текущего процесса."""
+
+    def __init__(self, size):
+        self.size = size
+        self.ids = OrderedDict()
+        self.lock = Lock()
+
+    def add(self, pk):
+        with self.lock:
+            self.ids[pk] = None
+            self.ids.move_to_end(pk)
+            if len(self.ids) > self.size:
+                self.ids.popitem(last=False)
+
+    def __contains__(self, pk):
+        return pk in self.ids
+
+
+deleted_recipes = DeletedIds(settings.SHORT_LINK_DELETED_CACHE_SIZE)
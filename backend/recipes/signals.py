@@ -0,0 +1,254 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import QuerySet
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_delete, pre_save
+)
+from django.db import transaction
+from django.dispatch import receiver
+
+from .cache import invalidate_catalog, invalidate_feed
+from .changes import recipe_changed
+from .counters import change_counter
+from .images import schedule_variants, variants_field, variants_ready
+from .models import (
+    Favorites, FoodUser, Ingredients, IngredientsInRecipes, Recipes,
+    ShoppingCart, ShoppingCartIngredients, Subscription, Tags
+)
+from .short_links import deleted_recipes
+
+
+@receiver(post_save, sender=Tags)
+@receiver(post_delete, sender=Tags)
+@receiver(post_save, sender=Ingredients)
+@receiver(post_delete, sender=Ingredients)
+def catalog_changed(sender, **kwargs):
+    invalidate_catalog(sender)
+
+
+@receiver(post_save, sender=Recipes)
+@receiver(post_save, sender=FoodUser)
+def image_saved(sender, instance, update_fields=None, **kwargs):
+    field = 'image' if sender is Recipes else 'avatar'
+    if update_fields is not None and field not in update_fields:
+        return
+    image = getattr(instance, field)
+    if image and not variants_ready(image):
+        schedule_variants(instance, field)
+    elif not image and getattr(instance, variants_field(field)):
+        setattr(instance, variants_field(field), '')
+        sender.objects.filter(pk=instance.pk).update(
+            **{variants_field(field): ''}
+        )
+
+
+@receiver(post_delete, sender=Recipes)
+def recipe_deleted(sender, instance, **kwargs):
+    deleted_recipes.add(instance.pk)
+
+
+COUNTED_RELATIONS = {
+    Favorites: ((Recipes, 'recipe_id', 'favorites_count'),),
+    ShoppingCart: ((Recipes, 'recipe_id', 'in_carts_count'),),
+    Recipes: ((get_user_model(), 'author_id', 'recipes_count'),),
+    Subscription: (
+        (get_user_model(), 'author_id', 'followers_count'),
+        (get_user_model(), 'user_id', 'following_count'),
+    ),
+    IngredientsInRecipes: ((Ingredients, 'ingredient_id', 'recipes_count'),),
+}
+
+
+def update_counters(sender, instance, delta):
+    for model, field, counter in COUNTED_RELATIONS[sender]:
+        change_counter(
+            model.objects.filter(pk=getattr(instance, field)), counter, delta
+        )
+
+
+@receiver(post_save, sender=Favorites)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_save, sender=Recipes)
+@receiver(post_save, sender=Subscription)
+@receiver(post_save, sender=IngredientsInRecipes)
+def counted_created(sender, instance, created, **kwargs):
+    if created:
+        update_counters(sender, instance, 1)
+
+
+@receiver(post_delete, sender=Favorites)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_delete, sender=Recipes)
+@receiver(post_delete, sender=Subscription)
+@receiver(post_delete, sender=IngredientsInRecipes)
+def counted_deleted(sender, instance, **kwargs):
+    update_counters(sender, instance, -1)
+
+
+@receiver(m2m_changed, sender=Recipes.tags.through)
+def recipe_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Счётчики тегов; изменения считаются до удаления связей."""
+    if action not in ('post_add', 'pre_remove', 'pre_clear'):
+        return
+    delta = 1 if action == 'post_add' else -1
+    if not reverse:
+        tags = (
+            Tags.objects.filter(pk__in=pk_set) if action == 'post_add'
+            else Tags.objects.filter(recipes=instance)
+        )
+        if action == 'pre_remove':
+            tags = tags.filter(pk__in=pk_set)
+        change_counter(tags, 'recipes_count', delta)
+        return
+    recipes = instance.recipes.all()
+    if action == 'post_add':
+        count = len(pk_set)
+    elif action == 'pre_remove':
+        count = recipes.filter(pk__in=pk_set).count()
+    else:
+        count = recipes.count()
+    change_counter(
+        Tags.objects.filter(pk=instance.pk), 'recipes_count', delta * count
+    )
+
+
+@receiver(recipe_changed)
+def recipe_ingredients_added(sender, change, **kwargs):
+    """Продукты, созданные через bulk_create, post_save не получают."""
+    if change.added:
+        change_counter(
+            Ingredients.objects.filter(pk__in=change.added),
+            'recipes_count',
+            1
+        )
+
+
+@receiver(recipe_changed)
+def recipe_in_carts_changed(sender, change, **kwargs):
+    """Строки из bulk_create и bulk_update; удалённые учитывает post_delete."""
+    if change.created or not (change.added or change.changed):
+        return
+    ShoppingCartIngredients.objects.change_recipe(
+        change.recipe,
+        {
+            ingredient_id: old
+            for ingredient_id, (old, _) in change.changed.items()
+        },
+        change.new_amounts,
+    )
+
+
+@receiver(post_save, sender=ShoppingCart)
+def recipe_added_to_cart(sender, instance, created, **kwargs):
+    if created:
+        ShoppingCartIngredients.objects.add_recipe(
+            instance.user_id, instance.recipe_id
+        )
+
+
+@receiver(pre_delete, sender=ShoppingCart)
+def recipe_removed_from_cart(sender, instance, **kwargs):
+    """До удаления: вместе с рецептом удаляется и его состав."""
+    ShoppingCartIngredients.objects.remove_recipe(
+        instance.user_id, instance.recipe_id
+    )
+
+
+@receiver(pre_save, sender=IngredientsInRecipes)
+def recipe_ingredient_saving(sender, instance, **kwargs):
+    instance.saved_amount = None if instance._state.adding else (
+        IngredientsInRecipes.objects.filter(pk=instance.pk)
+        .values_list('recipe_id', 'ingredient_id', 'amount')
+        .first()
+    )
+
+
+@receiver(post_save, sender=IngredientsInRecipes)
+def recipe_ingredient_saved(sender, instance, **kwargs):
+    old_amounts = {}
+    if instance.saved_amount is not None:
+        recipe_id, ingredient_id, amount = instance.saved_amount
+        old_amounts = {ingredient_id: amount}
+        if recipe_id != instance.recipe_id:
+            ShoppingCartIngredients.objects.change_recipe(
+                recipe_id, old_amounts, {}
+            )
+            old_amounts = {}
+    ShoppingCartIngredients.objects.change_recipe(
+        instance.recipe_id,
+        old_amounts,
+        {instance.ingredient_id: instance.amount},
+    )
+
+
+def deletes_recipe(origin):
+    """Удаление начато не со строки состава и не с продукта."""
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return origin is not None and model not in (
+        IngredientsInRecipes, Ingredients
+    )
+
+
+@receiver(post_delete, sender=IngredientsInRecipes)
+def recipe_ingredient_deleted(sender, instance, origin=None, **kwargs):
+    """Рецепт, удаляемый целиком, уже вычтен при удалении из корзин."""
+    if deletes_recipe(origin):
+        return
+    ShoppingCartIngredients.objects.change_recipe(
+        instance.recipe_id, {instance.ingredient_id: instance.amount}, {}
+    )
+
+
+@receiver(pre_delete, sender=Recipes)
+def recipe_tags_deleted(sender, instance, **kwargs):
+    change_counter(
+        Tags.objects.filter(recipes=instance), 'recipes_count', -1
+    )
+
+
+@receiver(post_save, sender=Subscription)
+@receiver(post_delete, sender=Subscription)
+@receiver(post_save, sender=Favorites)
+@receiver(post_delete, sender=Favorites)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+def feed_changed(sender, instance, **kwargs):
+    invalidate_feeds([instance.user_id])
+
+
+def invalidate_feeds(user_ids):
+    """Сброс после фиксации, иначе в новую версию попадут старые данные."""
+    if settings.FEED_CACHE_TIMEOUT:
+        user_ids = list(user_ids)
+        transaction.on_commit(lambda: invalidate_feed(*user_ids))
+
+
+def followers(**lookups):
+    return Subscription.objects.filter(**lookups).values_list(
+        'user_id', flat=True
+    ).distinct()
+
+
+@receiver(post_save, sender=Recipes)
+@receiver(post_delete, sender=Recipes)
+def author_recipe_changed(sender, instance, **kwargs):
+    invalidate_feeds(followers(author_id=instance.author_id))
+
+
+@receiver(post_save, sender=IngredientsInRecipes)
+@receiver(post_delete, sender=IngredientsInRecipes)
+def author_recipe_ingredient_changed(sender, instance, **kwargs):
+    invalidate_feeds(followers(author__recipes=instance.recipe_id))
+
+
+@receiver(m2m_changed, sender=Recipes.tags.through)
+def author_recipe_tags_changed(sender, instance, action, reverse, pk_set,
+                               **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        invalidate_feeds(followers(author_id=instance.author_id))
+    elif action == 'pre_clear':
+        invalidate_feeds(followers(author__recipes__tags=instance))
+    else:
+        invalidate_feeds(followers(author__recipes__in=pk_set))
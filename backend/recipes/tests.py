@@ -0,0 +1,87 @@
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .models import (
+    Favorites, Ingredients, IngredientsInRecipes, Recipes, ShoppingCart,
+    Subscription, Tags
+)
+
+User = get_user_model()
+
+
+class AdminChangelistQueryCountTest(TestCase):
+    """Число запросов страниц админки не зависит от числа строк."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            email='admin@example.com', username='admin',
+            first_name='Админ', last_name='Сайта', password='pass',
+        )
+        cls.rows = 0
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def create_rows(self, count):
+        for number in range(self.rows, self.rows + count):
+            author = User.objects.create_user(
+                email=f'author{number}@example.com',
+                username=f'author{number}',
+                first_name='Автор', last_name='Рецептов',
+            )
+            ingredient = Ingredients.objects.create(
+                name=f'продукт {number}', measurement_unit='г'
+            )
+            tag = Tags.objects.create(
+                name=f'тег {number}', slug=f'tag-{number}'
+            )
+            recipe = Recipes.objects.create(
+                author=author, name=f'рецепт {number}',
+                text='описание', cooking_time=number + 1,
+            )
+            recipe.tags.add(tag)
+            IngredientsInRecipes.objects.create(
+                recipe=recipe, ingredient=ingredient, amount=number + 1
+            )
+            Favorites.objects.create(user=self.admin, recipe=recipe)
+            ShoppingCart.objects.create(user=self.admin, recipe=recipe)
+            Subscription.objects.create(user=self.admin, author=author)
+        self.rows += count
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelists(self):
+        urls = {
+            model._meta.label: reverse(
+                f'admin:{model._meta.app_label}_'
+                f'{model._meta.model_name}_changelist'
+            )
+            for model in admin.site._registry
+            if model._meta.app_label in ('recipes', 'authtoken')
+        }
+        self.create_rows(5)
+        few = {label: self.count_queries(url) for label, url in urls.items()}
+        self.create_rows(5)
+        for label, url in urls.items():
+            with self.subTest(label):
+                self.assertEqual(self.count_queries(url), few[label])
+
+    def test_filtered_changelists(self):
+        urls = (
+            reverse('admin:recipes_recipes_changelist') + '?author=author',
+            reverse('admin:recipes_ingredientsinrecipes_changelist')
+            + '?recipe=рецепт',
+        )
+        self.create_rows(5)
+        few = [self.count_queries(url) for url in urls]
+        self.create_rows(5)
+        self.assertEqual([self.count_queries(url) for url in urls], few)
@@ -0,0 +1,49 @@
+import json
+import os
+from base64 import b64decode, b64encode
+from pathlib import Path, PurePosixPath
+from uuid import uuid4
+
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+IMAGE_UPLOAD_TO = 'recipes/images'
+
+
+def checkpoint_path(file_path, checkpoint=None):
+    return Path(checkpoint or f'{file_path}.checkpoint')
+
+
+def read_checkpoint(path):
+    try:
+        return json.loads(path.read_text(encoding='utf-8'))
+    except FileNotFoundError:
+        return None
+
+
+def write_checkpoint(path, data):
+    """Атомарно заменяет файл контрольной точки."""
+    temp = path.with_name(f'{path.name}.tmp')
+    temp.write_text(json.dumps(data), encoding='utf-8')
+    os.replace(temp, path)
+
+
+def read_image(name):
+    with default_storage.open(name) as file:
+        return b64encode(file.read()).decode()
+
+
+def save_image(record, images_from=None):
+    """Сохраняет картинку записи в хранилище, возвращает её имя."""
+    if record.get('image_data'):
+        extension = PurePosixPath(record.get('image') or '.png').suffix
+        return default_storage.save(
+            f'{IMAGE_UPLOAD_TO}/{uuid4().hex}{extension}',
+            ContentFile(b64decode(record['image_data']))
+        )
+    name = record['image']
+    if images_from is None or default_storage.exists(name):
+        return name
+    with open(Path(images_from) / name, 'rb') as file:
+        return default_storage.save(name, File(file))
@@ -1,7 +1,20 @@
+from django.conf import settings
 from django.urls import path
 
-from .views import short_link_redirect
+from . import views
+
+if settings.ASYNC_VIEWS:
+    short_link_redirect = views.short_link_redirect_async
+    legacy_short_link_redirect = views.legacy_short_link_redirect_async
+else:
+    short_link_redirect = views.short_link_redirect
+    legacy_short_link_redirect = views.legacy_short_link_redirect
 
 urlpatterns = [
-    path('s/<int:pk>/', short_link_redirect, name='recipe-short-link')
+    path(
+        's/<int:pk>/',
+        legacy_short_link_redirect,
+        name='recipe-legacy-short-link'
+    ),
+    path('s/<str:code>/', short_link_redirect, name='recipe-short-link'),
 ]
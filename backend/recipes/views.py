@@ -2,9 +2,37 @@ from django.shortcuts import redirect
 from django.http import Http404
 
 from .models import Recipes
+from .short_links import decode, deleted_recipes
+from foodgram_backend.metrics import SHORT_LINK_REDIRECTS
 
 
-def short_link_redirect(request, pk):
+def recipe_redirect(pk):
+    SHORT_LINK_REDIRECTS.inc()
+    return redirect(f'/recipes/{pk}')
+
+
+def get_short_code_pk(code):
+    pk = decode(code)
+    if pk is None or pk in deleted_recipes:
+        raise Http404(f'Короткая ссылка {code} не найдена')
+    return pk
+
+
+def short_link_redirect(request, code):
+    return recipe_redirect(get_short_code_pk(code))
+
+
+async def short_link_redirect_async(request, code):
+    return recipe_redirect(get_short_code_pk(code))
+
+
+def legacy_short_link_redirect(request, pk):
     if not Recipes.objects.filter(pk=pk).exists():
         raise Http404(f'Рецепт с id={pk} не найден')
-    return redirect(f'/recipes/{pk}')
+    return recipe_redirect(pk)
+
+
+async def legacy_short_link_redirect_async(request, pk):
+    if not await Recipes.objects.filter(pk=pk).aexists():
+        raise Http404(f'Рецепт с id={pk} не найден')
+    return recipe_redirect(pk)